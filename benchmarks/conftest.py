@@ -0,0 +1,75 @@
+import os
+
+import pytest
+from django.apps import apps
+from django.db import connection
+
+from tenant_schemas_celery.compat import get_tenant_model, schema_context
+from tenant_schemas_celery.test_utils import ClientFactory
+
+# Fleet sizes of the scheduler benchmarks, i.e. `BENCHMARK_TENANTS=10,100`.
+FLEET_SIZES = tuple(int(size) for size in os.environ.get("BENCHMARK_TENANTS", "10,1000,10000").split(","))
+FLEET_PREFIX = "fleet_"
+
+
+@pytest.fixture
+def tenant(transactional_db):
+    with ClientFactory() as factory:
+        yield factory.create_client(
+            name="benchmark", schema_name="benchmark", domain_url="benchmark.test.com"
+        )
+
+
+def _create_fleet(size: int) -> list[str]:
+    """Create `size` tenants, each with one enabled periodic task.
+
+    Running migrations for thousands of schemas would take hours, so the
+    schemas only get copies of django-celery-beat's tables, and the tenants
+    are inserted without creating schemas.
+    """
+    from django_celery_beat.models import IntervalSchedule, PeriodicTask
+
+    schema_names = [f"{FLEET_PREFIX}{index:05}" for index in range(size)]
+    tables = [model._meta.db_table for model in apps.get_app_config("django_celery_beat").get_models()]
+
+    with schema_context("public"):
+        get_tenant_model().objects.bulk_create(
+            [get_tenant_model()(name=schema_name[:16], schema_name=schema_name) for schema_name in schema_names],
+            batch_size=1000,
+        )
+
+        with connection.cursor() as cursor:
+            for schema_name in schema_names:
+                cursor.execute(
+                    f'CREATE SCHEMA "{schema_name}"; '
+                    + " ".join(
+                        f'CREATE TABLE "{schema_name}"."{table}" (LIKE public."{table}" INCLUDING ALL);'
+                        for table in tables
+                    )
+                )
+
+    for schema_name in schema_names:
+        with schema_context(schema_name):
+            interval = IntervalSchedule.objects.create(every=1, period=IntervalSchedule.MINUTES)
+            PeriodicTask.objects.create(name=f"fleet_task@{schema_name}", task="fleet_task", interval=interval)
+
+    return schema_names
+
+
+def _drop_fleet(schema_names: list[str]) -> None:
+    with schema_context("public"):
+        with connection.cursor() as cursor:
+            for schema_name in schema_names:
+                cursor.execute(f'DROP SCHEMA IF EXISTS "{schema_name}" CASCADE')
+
+        get_tenant_model().objects.filter(schema_name__startswith=FLEET_PREFIX).delete()
+
+
+@pytest.fixture(scope="module", params=FLEET_SIZES, ids=lambda size: f"{size}_tenants")
+def fleet(request, django_db_setup, django_db_blocker) -> list[str]:
+    with django_db_blocker.unblock():
+        schema_names = _create_fleet(request.param)
+        try:
+            yield schema_names
+        finally:
+            _drop_fleet(schema_names)
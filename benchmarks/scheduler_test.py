@@ -0,0 +1,100 @@
+"""Benchmarks of the tenant-aware schedulers with synthetic fleets of tenants.
+
+Fleet sizes can be changed with the `BENCHMARK_TENANTS` environment variable.
+"""
+import itertools
+
+import pytest
+from celery import schedules
+
+from tenant_schemas_celery.app import CeleryApp
+from tenant_schemas_celery.db_scheduler import TenantAwareDatabaseScheduler, TenantAwarePeriodicTasks
+from tenant_schemas_celery.scheduler import TenantAwarePersistentScheduler, TenantAwareScheduler
+from tenant_schemas_celery.sqlite_scheduler import TenantAwareSQLiteScheduler
+
+pytestmark = pytest.mark.django_db
+
+# Big fleets take seconds per round, don't repeat them too often.
+PEDANTIC = {"rounds": 3, "iterations": 1, "warmup_rounds": 0}
+
+
+@pytest.fixture
+def app(fleet: list[str]) -> CeleryApp:
+    app = CeleryApp("benchmark", broker="memory://", set_as_current=False)
+    app.conf.beat_schedule = {
+        "all_tenants_task": {
+            "task": "all_tenants_task",
+            "schedule": schedules.crontab(minute="*"),
+        },
+        "listed_tenants_task": {
+            "task": "listed_tenants_task",
+            "schedule": schedules.crontab(minute="*"),
+            "tenant_schemas": fleet,
+        },
+    }
+    return app
+
+
+@pytest.mark.parametrize(
+    "scheduler_cls", [TenantAwareScheduler, TenantAwarePersistentScheduler, TenantAwareSQLiteScheduler]
+)
+def test_setup_schedule(benchmark, app: CeleryApp, scheduler_cls, tmp_path) -> None:
+    counter = itertools.count()
+
+    def setup():
+        # Every round needs a fresh schedule file.
+        filename = tmp_path / f"schedule-{next(counter)}"
+        return (scheduler_cls(app, schedule_filename=str(filename), lazy=True),), {}
+
+    benchmark.pedantic(lambda scheduler: scheduler.setup_schedule(), setup=setup, **PEDANTIC)
+
+
+@pytest.mark.parametrize(
+    "scheduler_cls", [TenantAwareScheduler, TenantAwarePersistentScheduler, TenantAwareSQLiteScheduler]
+)
+def test_merge_inplace(benchmark, app: CeleryApp, scheduler_cls, tmp_path) -> None:
+    scheduler = scheduler_cls(app, schedule_filename=str(tmp_path / "schedule"))
+
+    benchmark.pedantic(scheduler.merge_inplace, args=(app.conf.beat_schedule,), **PEDANTIC)
+
+
+def test_database_scheduler_setup_schedule(benchmark, app: CeleryApp) -> None:
+    benchmark.pedantic(lambda: TenantAwareDatabaseScheduler(app=app).schedule, **PEDANTIC)
+
+
+def test_database_scheduler_enabled_models(benchmark, app: CeleryApp) -> None:
+    scheduler = TenantAwareDatabaseScheduler(app=app, lazy=True)
+
+    benchmark.pedantic(scheduler.enabled_models, **PEDANTIC)
+
+
+def test_database_scheduler_last_change(benchmark, fleet: list[str]) -> None:
+    benchmark.pedantic(TenantAwarePeriodicTasks.last_change, **PEDANTIC)
+
+
+def test_apply_entry_to_all_tenants(benchmark, app: CeleryApp) -> None:
+    scheduler = TenantAwareScheduler(app)
+    entry = scheduler.schedule["all_tenants_task@__all_tenants_only__"]
+
+    with app.producer_or_acquire() as producer:
+        benchmark.pedantic(scheduler.apply_entry, args=(entry,), kwargs={"producer": producer}, **PEDANTIC)
+
+
+def test_apply_entry_to_listed_tenants(benchmark, app: CeleryApp) -> None:
+    scheduler = TenantAwareScheduler(app)
+    entry = scheduler.schedule["listed_tenants_task@__tenant_schemas__"]
+
+    with app.producer_or_acquire() as producer:
+        benchmark.pedantic(scheduler.apply_entry, args=(entry,), kwargs={"producer": producer}, **PEDANTIC)
+
+
+@pytest.mark.parametrize("scheduler_cls", [TenantAwarePersistentScheduler, TenantAwareSQLiteScheduler])
+def test_sync_after_apply(benchmark, app: CeleryApp, scheduler_cls, tmp_path) -> None:
+    scheduler = scheduler_cls(app, schedule_filename=str(tmp_path / "schedule"))
+    entry_name = "all_tenants_task@__all_tenants_only__"
+
+    def reserve_and_sync():
+        scheduler.reserve(scheduler.schedule[entry_name])
+        scheduler.sync()
+
+    benchmark(reserve_and_sync)
@@ -0,0 +1,30 @@
+"""Benchmarks of the import cost of the modules loaded by worker and beat startup.
+
+Run with `./run-benchmarks`, see README.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+MODULES = (
+    "tenant_schemas_celery.app",
+    "tenant_schemas_celery.scheduler",
+    "tenant_schemas_celery.sqlite_scheduler",
+)
+
+
+def _run_in_new_interpreter(code: str) -> None:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(path for path in sys.path if path)}
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+def test_start_interpreter(benchmark) -> None:
+    """Baseline of the import benchmarks, which import celery first to mostly measure this package."""
+    benchmark.pedantic(_run_in_new_interpreter, args=("import celery.app.task",), rounds=10)
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import(benchmark, module: str) -> None:
+    benchmark.pedantic(_run_in_new_interpreter, args=(f"import celery.app.task; import {module}",), rounds=10)
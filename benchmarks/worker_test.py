@@ -0,0 +1,123 @@
+"""Benchmarks of the code run for every published and executed tenant task.
+
+Run with `./run-benchmarks`, see README.
+"""
+import tracemalloc
+
+import pytest
+from django.db import connection
+
+from tenant_schemas_celery.app import restore_schema, switch_schema
+from tenant_schemas_celery.cache import SimpleCache
+from tenant_schemas_celery.compat import schema_context
+from tenant_schemas_celery.task import SharedTenantCache, TenantTask, headers_with_schema
+from tenant_schemas_celery.test_tasks import get_schema_name
+
+CACHE_SIZES = (10, 1_000, 100_000)
+
+
+def test_headers_with_schema(benchmark) -> None:
+    benchmark(headers_with_schema, {"some": "header"})
+
+
+def test_headers_with_schema_already_present(benchmark) -> None:
+    benchmark(headers_with_schema, {"_schema_name": "benchmark"})
+
+
+def _switch_and_restore(task) -> None:
+    switch_schema(task, {})
+    restore_schema(task)
+
+
+def _switch_and_restore_with_query(task) -> None:
+    switch_schema(task, {})
+    # Forces `SET search_path` to be sent, if the schema was switched.
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    restore_schema(task)
+
+
+@pytest.mark.parametrize("run", [_switch_and_restore, _switch_and_restore_with_query])
+def test_switch_schema_same_schema(benchmark, tenant, run) -> None:
+    get_schema_name.push_request(headers={"_schema_name": tenant.schema_name})
+    try:
+        with schema_context(tenant.schema_name):
+            benchmark(run, get_schema_name)
+    finally:
+        get_schema_name.pop_request()
+
+
+@pytest.mark.parametrize("run", [_switch_and_restore, _switch_and_restore_with_query])
+def test_switch_schema_different_schema(benchmark, tenant, run) -> None:
+    class CachedTenantTask(TenantTask):
+        tenant_cache_seconds = 3600
+
+    CachedTenantTask.get_tenant_for_schema(tenant.schema_name)
+    get_schema_name.push_request(headers={"_schema_name": tenant.schema_name})
+    try:
+        benchmark(run, get_schema_name)
+    finally:
+        get_schema_name.pop_request()
+        SharedTenantCache().clear()
+
+
+def test_get_tenant_for_schema_cache_hit(benchmark, tenant) -> None:
+    class CachedTenantTask(TenantTask):
+        tenant_cache_seconds = 3600
+
+    CachedTenantTask.get_tenant_for_schema(tenant.schema_name)
+    try:
+        benchmark(CachedTenantTask.get_tenant_for_schema, tenant.schema_name)
+    finally:
+        SharedTenantCache().clear()
+
+
+def test_get_tenant_for_schema_cache_miss(benchmark, tenant) -> None:
+    class UncachedTenantTask(TenantTask):
+        tenant_cache_seconds = 0
+
+    benchmark(UncachedTenantTask.get_tenant_for_schema, tenant.schema_name)
+
+
+def _tenant_size(task, schema_name: str, count: int = 100) -> float:
+    """Return the average bytes allocated by the tenants loaded by the task, kept alive."""
+    tracemalloc.start()
+    try:
+        allocated_before = tracemalloc.get_traced_memory()[0]
+        tenants = [task.get_tenant_queryset().get(schema_name=schema_name) for _ in range(count)]
+        allocated = tracemalloc.get_traced_memory()[0] - allocated_before
+    finally:
+        tracemalloc.stop()
+    del tenants
+    return allocated / count
+
+
+@pytest.mark.parametrize("tenant_fields", [None, ()], ids=["all_fields", "schema_name_only"])
+def test_get_tenant_queryset_tenant_size(benchmark, tenant, tenant_fields) -> None:
+    """Cached tenants' size is reported in `extra_info`, the benchmark times their lookup."""
+
+    class FieldsTenantTask(TenantTask):
+        pass
+
+    FieldsTenantTask.tenant_fields = tenant_fields
+    benchmark.extra_info["bytes_per_tenant"] = _tenant_size(FieldsTenantTask, tenant.schema_name)
+    benchmark(FieldsTenantTask.get_tenant_queryset().get, schema_name=tenant.schema_name)
+
+
+def _filled_cache(size: int) -> SimpleCache:
+    cache = SimpleCache()
+    for index in range(size):
+        cache.set(f"tenant{index}", index, expire_seconds=3600)
+    return cache
+
+
+@pytest.mark.parametrize("size", CACHE_SIZES)
+def test_simple_cache_get(benchmark, size: int) -> None:
+    cache = _filled_cache(size)
+    benchmark(cache.get, f"tenant{size // 2}", None)
+
+
+@pytest.mark.parametrize("size", CACHE_SIZES)
+def test_simple_cache_set(benchmark, size: int) -> None:
+    cache = _filled_cache(size)
+    benchmark(cache.set, f"tenant{size // 2}", size, 3600)
@@ -0,0 +1,77 @@
+import asyncio
+import inspect
+import os
+import threading
+from typing import Optional
+
+from tenant_schemas_celery.task import TenantTask
+
+
+class EventLoopThread:
+    """An event loop run by a daemon thread, shared by the coroutine tasks of a process.
+
+    Started on first use, and again in forked processes, which don't inherit
+    the thread running their parent's loop.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid: Optional[int] = None
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="tenant-event-loop", daemon=True).start()
+                self._loop, self._pid = loop, os.getpid()
+            return self._loop
+
+    def run(self, coroutine):
+        """Run the coroutine on the loop, blocking the calling thread until it's done.
+
+        The coroutine runs in a copy of the caller's context, so it inherits the
+        schema selected for the task by `switch_schema`.
+        """
+        loop = self.get_loop()
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            coroutine.close()
+            raise RuntimeError("Can't block the shared event loop, await the task's `run` method instead")
+
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def close(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None and self._pid == os.getpid():
+            loop.call_soon_threadsafe(loop.stop)
+
+
+event_loop = EventLoopThread()
+
+
+class AsyncTenantTask(TenantTask):
+    """Base of tasks defined with `async def`, run on the process' shared event loop.
+
+    Coroutines share the loop thread's database connections, so the task's
+    schema isn't selected on them: it's selected in the context, where
+    `headers_with_schema` and `to_tenant_thread` read it. With the threads
+    pool, the tasks of many tenants run concurrently on one loop. Tasks
+    defined with `def` are run like other tenant tasks.
+    """
+
+    abstract = True
+
+    @property
+    def tenant_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.run)
+
+    def __call__(self, *args, **kwargs):
+        result = super().__call__(*args, **kwargs)
+        if asyncio.iscoroutine(result):
+            return event_loop.run(result)
+        return result
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+from tenant_schemas_celery.aio import AsyncTenantTask
+from tenant_schemas_celery.app import CeleryApp
+from tenant_schemas_celery.context import get_current_schema
+from tenant_schemas_celery.task import headers_with_schema
+
+
+def test_coroutine_tasks_should_share_the_event_loop() -> None:
+    app = CeleryApp(set_as_current=False)
+
+    @app.task(base=AsyncTenantTask, shared=False)
+    async def get_schemas() -> tuple[str, str, str, int]:
+        await asyncio.sleep(0.05)
+        return (
+            get_current_schema(),
+            headers_with_schema(None)["_schema_name"],
+            connection.schema_name,
+            id(asyncio.get_running_loop()),
+        )
+
+    app.finalize()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(
+            executor.map(
+                lambda schema_name: get_schemas.apply(headers={"_schema_name": schema_name}).get(),
+                ["tenant1", "tenant2"],
+            )
+        )
+
+    assert [result[:3] for result in results] == [("tenant1", "tenant1", "public"), ("tenant2", "tenant2", "public")]
+    assert results[0][3] == results[1][3]
+    assert get_current_schema() == "public"
+
+
+def test_sync_tasks_should_switch_the_connections() -> None:
+    app = CeleryApp(set_as_current=False)
+
+    @app.task(base=AsyncTenantTask, shared=False)
+    def get_schema() -> str:
+        return connection.schema_name
+
+    @app.task(base=AsyncTenantTask, shared=False)
+    async def get_schema_async() -> str:
+        return connection.schema_name
+
+    assert not get_schema.tenant_async
+    assert get_schema_async.tenant_async
+    assert get_schema.apply().get() == get_schema_async.apply().get() == "public"
+
+
+def test_concurrent_coroutine_tasks_should_reset_their_own_schema() -> None:
+    from tenant_schemas_celery.app import restore_schema, switch_schema
+
+    app = CeleryApp(set_as_current=False)
+
+    @app.task(base=AsyncTenantTask, shared=False)
+    async def task() -> None:
+        ...
+
+    switched = threading.Barrier(2)
+
+    def run(schema_name: str) -> tuple[str, str]:
+        task.push_request(headers={"_schema_name": schema_name})
+        try:
+            switch_schema(task, {})
+            # Both requests are running before either is done.
+            switched.wait(timeout=5)
+            selected = headers_with_schema(None)["_schema_name"]
+            restore_schema(task)
+        finally:
+            task.pop_request()
+        return selected, headers_with_schema(None)["_schema_name"]
+
+    app.finalize()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(run, ["tenant1", "tenant2"]))
+
+    assert results == [("tenant1", "public"), ("tenant2", "public")]
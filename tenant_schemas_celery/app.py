@@ -1,13 +1,25 @@
 try:
-    from celery import Celery
+    from celery import Celery, Task
+    from celery.utils import uuid
 except ImportError:
     raise ImportError("celery is required to use tenant_schemas_celery")
 
-from django.db import connection, connections
-
-from celery.signals import task_prerun, task_postrun
+from celery.signals import celeryd_after_setup, task_prerun, task_postrun
+from time import perf_counter
 
+from tenant_schemas_celery.context import reset_current_schema, set_current_schema
+from tenant_schemas_celery.dedup import task_deduplicator
+from tenant_schemas_celery.metrics import metrics
+from tenant_schemas_celery.pool import schema_connections
+from tenant_schemas_celery.readiness import tenant_readiness
+from tenant_schemas_celery.routers import reset_read_only_database, set_read_only_database
 from tenant_schemas_celery.task import headers_with_schema
+from tenant_schemas_celery.tiers import tenant_tiers
+# Registers the worker's remote control commands.
+from tenant_schemas_celery import control  # noqa: F401
+
+# Tasks of tenants being migrated are retried in `TenantTask.before_start`, called since celery 5.2.
+DEFER_MIGRATING_TENANTS = hasattr(Task, "before_start")
 
 
 def get_schema_name_from_task(task, kwargs):
@@ -19,52 +31,142 @@ def get_schema_name_from_task(task, kwargs):
 
 def switch_schema(task, kwargs, **kw):
     """ Switches schema of the task, before it has been run. """
+    if not metrics.enabled:
+        _switch_schema(task, kwargs)
+        return
+
+    started_at = perf_counter()
+    schema, switched = _switch_schema(task, kwargs)
+    schema_label = metrics.schema_label(schema)
+    metrics.observe("tenant_schema_switch_seconds", perf_counter() - started_at, schema=schema_label)
+    if not switched:
+        metrics.increment("tenant_schema_switch_skipped_total", schema=schema_label)
+
+    # Kept on the request, as requests of the same task may run concurrently in the threads pool.
+    setattr(task.request, "_metrics_schema", schema_label)
+    setattr(task.request, "_metrics_started_at", perf_counter())
+
+    if tenant_tiers.enabled:
+        headers = task.request.headers or {}
+        if "_tenant_tier" not in headers:
+            # Merged with `task.request`, like the schema name.
+            headers = {name: task.request.get(name) for name in ("_tenant_tier", "_tenant_tier_sent_at")}
+        tenant_tiers.observe_latency(headers)
+
+
+def _switch_schema(task, kwargs):
+    """Returns the task's schema and whether any connection had to be switched."""
     # Lazily load needed functions, as they import django model functions which
     # in turn load modules that need settings to be loaded and we can't
     # guarantee this module was loaded when the settings were ready.
-    from .compat import get_public_schema_name
+    from django.db import connections
 
-    old_schema = (connection.schema_name, connection.include_public_schema)
-    setattr(task, "_old_schema", old_schema)
+    from .compat import get_public_schema_name
 
     schema = get_schema_name_from_task(task, kwargs) or get_public_schema_name()
 
-    tenant_databases = task.get_tenant_databases()
+    if (
+        schema != get_public_schema_name()
+        and tenant_readiness.enabled
+        and DEFER_MIGRATING_TENANTS
+        and not tenant_readiness.is_ready(schema)
+    ):
+        # Don't touch the connections, the task will be retried by `TenantTask.before_start`.
+        setattr(task, "_old_schemas", {})
+        # Kept on the request, as requests of the same task may run concurrently in the threads pool.
+        setattr(task.request, "_tenant_migrating", schema)
+        return schema, False
+
+    tenant_databases = task.get_tenant_databases_for_schema(schema)
+
+    if task.tenant_async:
+        # Coroutines share the event loop thread's connections, so their schema
+        # is selected in the context instead, see `AsyncTenantTask`.
+        setattr(task.request, "_current_schema_token", set_current_schema(schema))
+        old_schemas = {}
+    elif schema_connections.enabled:
+        # Pinned connections keep their schema, there's nothing to restore.
+        setattr(task.request, "_pinned_connections", schema_connections.pin(tenant_databases, schema))
+        old_schemas = {}
+    else:
+        old_schemas = {
+            db_name: (connections[db_name].schema_name, connections[db_name].include_public_schema)
+            for db_name in tenant_databases
+        }
+    setattr(task, "_old_schemas", old_schemas)
+
+    if task.tenant_read_only:
+        # Route the task's queries to the first of its databases. The token is kept on the
+        # request, as requests of the same task may run concurrently in the threads pool.
+        setattr(task.request, "_read_only_database_token", set_read_only_database(tenant_databases[0]))
+
+    if task.tenant_async:
+        return schema, True
 
     # If the schema has not changed, don't do anything.
     if all(connections[db_name].schema_name == schema for db_name in tenant_databases):
-        return
+        return schema, False
 
-    if connection.schema_name != get_public_schema_name():
+    if schema == get_public_schema_name():
         for db_name in tenant_databases:
             connections[db_name].set_schema_to_public()
-
-    if schema == get_public_schema_name():
-        return
+        return schema, True
 
     tenant = task.get_tenant_for_schema(schema_name=schema)
     for db_name in tenant_databases:
         connections[db_name].set_tenant(tenant, include_public=True)
+    return schema, True
 
 
 def restore_schema(task, **kwargs):
     """ Switches the schema back to the one from before running the task. """
-    from .compat import get_public_schema_name
+    if not metrics.enabled:
+        _restore_schema(task)
+        return
 
-    schema_name = get_public_schema_name()
-    include_public = True
+    started_at = perf_counter()
+    schema_label = getattr(task.request, "_metrics_schema", "")
+    task_started_at = getattr(task.request, "_metrics_started_at", None)
+    if task_started_at is not None:
+        metrics.observe("tenant_task_runtime_seconds", started_at - task_started_at, schema=schema_label)
+        task.request._metrics_started_at = None
 
-    tenant_databases = task.get_tenant_databases()
+    _restore_schema(task)
+    metrics.observe("tenant_schema_restore_seconds", perf_counter() - started_at, schema=schema_label)
 
-    if hasattr(task, "_old_schema"):
-        schema_name, include_public = task._old_schema
 
-    # If the schema names match, don't do anything.
-    if all(connections[db_name].schema_name == schema_name for db_name in tenant_databases):
-        return
+def _restore_schema(task):
+    from django.db import connections
 
+    from .compat import get_public_schema_name
+
+    read_only_database_token = getattr(task.request, "_read_only_database_token", None)
+    if read_only_database_token is not None:
+        reset_read_only_database(read_only_database_token)
+        task.request._read_only_database_token = None
+
+    current_schema_token = getattr(task.request, "_current_schema_token", None)
+    if current_schema_token is not None:
+        reset_current_schema(current_schema_token)
+        task.request._current_schema_token = None
+
+    pinned_connections = getattr(task.request, "_pinned_connections", None)
+    if pinned_connections is not None:
+        schema_connections.unpin(pinned_connections)
+        task.request._pinned_connections = None
+
+    old_schemas = getattr(task, "_old_schemas", None)
+    if old_schemas is None:
+        old_schemas = {
+            db_name: (get_public_schema_name(), True)
+            for db_name in task.get_tenant_databases()
+        }
+
+    for db_name, (schema_name, include_public) in old_schemas.items():
+        # If the schema names match, don't do anything.
+        if connections[db_name].schema_name == schema_name:
+            continue
 
-    for db_name in tenant_databases:
         connections[db_name].set_schema(schema_name, include_public=include_public)
 
 
@@ -77,6 +179,22 @@ task_postrun.connect(
 )
 
 
+def switch_schema_after_django_fixup(**kwargs):
+    """Run `switch_schema` after the handlers of celery's Django fixup, installed when the worker starts.
+
+    The fixup closes the connections of `django.db.connections` before and
+    after each task, so pinned connections must only be swapped in once it
+    has run, and swapped out (by `restore_schema`) before it runs again.
+    """
+    task_prerun.disconnect(dispatch_uid="tenant_schemas_switch_schema")
+    task_prerun.connect(switch_schema, sender=None, dispatch_uid="tenant_schemas_switch_schema")
+
+
+celeryd_after_setup.connect(
+    switch_schema_after_django_fixup, dispatch_uid="tenant_schemas_switch_schema_after_django_fixup"
+)
+
+
 class CeleryApp(Celery):
     registry_cls = 'tenant_schemas_celery.registry:TenantTaskRegistry'
     task_cls = 'tenant_schemas_celery.task:TenantTask'
@@ -95,4 +213,40 @@ class CeleryApp(Celery):
 
     def send_task(self, name, args=None, kwargs=None, **options):
         options["headers"] = headers_with_schema(options.get("headers") or {})
-        return super().send_task(name, args=args, kwargs=kwargs, **options)
+        if tenant_tiers.enabled:
+            options = tenant_tiers.apply(
+                options,
+                router=options.get("router") or self.amqp.router,
+                name=options.get("route_name") or name,
+                args=args,
+                kwargs=kwargs,
+            )
+        dedup_window = options.pop("dedup_window", None)
+        if not task_deduplicator.enabled:
+            return super().send_task(name, args=args, kwargs=kwargs, **options)
+
+        if dedup_window is None:
+            dedup_window = self.get_dedup_window(name)
+        # Sends with a given id, i.e. retries, are sends of an existing task, not duplicates.
+        if not dedup_window or options.get("task_id"):
+            return super().send_task(name, args=args, kwargs=kwargs, **options)
+
+        schema_name = options["headers"]["_schema_name"]
+        key = task_deduplicator.key(name, schema_name, args, kwargs)
+        options["task_id"] = uuid()
+        duplicate_id = task_deduplicator.claim(key, options["task_id"], dedup_window, schema_name)
+        if duplicate_id is not None:
+            return self.AsyncResult(duplicate_id)
+
+        try:
+            return super().send_task(name, args=args, kwargs=kwargs, **options)
+        except Exception:
+            task_deduplicator.release(key)
+            raise
+
+    def get_dedup_window(self, name):
+        """Return the dedup window of the task with given name, see `TenantTask.get_tenant_dedup_window`."""
+        task = self.tasks.get(name)
+        if task is not None and hasattr(task, "get_tenant_dedup_window"):
+            return task.get_tenant_dedup_window()
+        return self.conf.get("task_tenant_dedup_window")
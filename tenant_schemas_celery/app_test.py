@@ -1,5 +1,12 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import pytest
+
 from tenant_schemas_celery.app import CeleryApp
 from tenant_schemas_celery.task import TenantTask
+from tenant_schemas_celery.test_tasks import RoutedTask
 
 
 class DummyTask(TenantTask):
@@ -30,3 +37,120 @@ def test_celery_app_should_allow_overriding_task_cls_as_string() -> None:
         ...
 
     assert isinstance(some_task, DummyTask)
+
+
+def test_switch_schema_should_only_touch_resolved_databases() -> None:
+    from django.db import connections
+
+    from tenant_schemas_celery.app import restore_schema, switch_schema
+
+    app = CeleryApp(set_as_current=False)
+
+    @app.task(base=RoutedTask, shared=False)
+    def task() -> None:
+        ...
+
+    task.push_request(headers={"_schema_name": "routed_tenant"})
+    try:
+        switch_schema(task, {})
+
+        assert connections["otherdb1"].schema_name == "routed_tenant"
+        assert connections["default"].schema_name == "public"
+
+        restore_schema(task)
+
+        assert connections["otherdb1"].schema_name == "public"
+    finally:
+        task.pop_request()
+
+
+def test_get_tenant_databases_for_schema_should_cache_resolved_databases() -> None:
+    from tenant_schemas_celery.task import SharedTenantDatabasesCache
+
+    class CachedRoutedTask(RoutedTask):
+        tenant_cache_seconds = 10
+
+    RoutedTask.resolved_schemas.clear()
+
+    assert CachedRoutedTask.get_tenant_databases_for_schema("cached_tenant") == ("otherdb1",)
+    assert CachedRoutedTask.get_tenant_databases_for_schema("cached_tenant") == ("otherdb1",)
+    assert CachedRoutedTask.get_tenant_databases_for_schema("public") == ("default",)
+    assert RoutedTask.resolved_schemas == ["cached_tenant"]
+    SharedTenantDatabasesCache().clear()
+
+
+def test_switch_schema_should_route_read_only_tasks_to_replica() -> None:
+    from django.db import connections
+
+    from tenant_schemas_celery.app import restore_schema, switch_schema
+    from tenant_schemas_celery.routers import get_read_only_database
+
+    app = CeleryApp(set_as_current=False)
+    # The schema is resolved to otherdb1 first, whose replica is otherdb2.
+    app.conf.task_tenant_replica_databases = {"otherdb1": "otherdb2"}
+
+    @app.task(base=RoutedTask, shared=False, tenant_read_only=True)
+    def task() -> None:
+        ...
+
+    task.push_request(headers={"_schema_name": "replica_tenant"})
+    try:
+        switch_schema(task, {})
+
+        assert get_read_only_database() == "otherdb2"
+        assert connections["otherdb2"].schema_name == "replica_tenant"
+        assert connections["otherdb1"].schema_name == "public"
+        assert connections["default"].schema_name == "public"
+
+        restore_schema(task)
+
+        assert get_read_only_database() is None
+        assert connections["otherdb2"].schema_name == "public"
+    finally:
+        task.pop_request()
+
+
+def test_replica_list_should_be_rejected_with_a_resolver() -> None:
+    app = CeleryApp(set_as_current=False)
+    app.conf.task_tenant_replica_databases = ("otherdb2",)
+
+    @app.task(base=RoutedTask, shared=False, tenant_read_only=True)
+    def task() -> None:
+        ...
+
+    with pytest.raises(ValueError):
+        task.get_tenant_databases_for_schema("replica_tenant")
+    RoutedTask.resolved_schemas.clear()
+
+
+def test_concurrent_read_only_requests_should_reset_their_own_database() -> None:
+    from tenant_schemas_celery.app import restore_schema, switch_schema
+    from tenant_schemas_celery.routers import get_read_only_database
+
+    app = CeleryApp(set_as_current=False)
+    app.conf.task_tenant_replica_databases = {"otherdb1": "otherdb2"}
+
+    @app.task(base=RoutedTask, shared=False, tenant_read_only=True)
+    def task() -> None:
+        ...
+
+    switched = threading.Barrier(2)
+
+    def run(schema_name: str) -> Optional[str]:
+        task.push_request(headers={"_schema_name": schema_name})
+        try:
+            switch_schema(task, {})
+            # Both requests are running before either is done.
+            switched.wait(timeout=5)
+            restore_schema(task)
+        finally:
+            task.pop_request()
+        return get_read_only_database()
+
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(run, ["tenant1", "tenant2"]))
+    finally:
+        RoutedTask.resolved_schemas.clear()
+
+    assert results == [None, None]
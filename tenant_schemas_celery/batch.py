@@ -0,0 +1,180 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
+
+from celery.signals import task_postrun, task_prerun
+from celery.utils import uuid
+from celery.worker.strategy import hybrid_to_proto2, proto1_to_proto2
+
+from tenant_schemas_celery.task import TenantTask
+
+logger = logging.getLogger(__name__)
+
+SUCCESS = "SUCCESS"
+FAILURE = "FAILURE"
+# The schema was being migrated, the batch has to be run later.
+DEFERRED = "DEFERRED"
+
+
+class BatchRequest(NamedTuple):
+    """A message of a batch task, as passed to the task."""
+
+    id: str
+    args: tuple
+    kwargs: dict[str, Any]
+    headers: dict[str, Any]
+    delivery_info: dict[str, Any]
+
+
+class _BufferedMessage(NamedTuple):
+    request: BatchRequest
+    ack: Any
+    reject: Any
+
+
+def _apply_batch(task: "TenantBatchTask", schema_name: str, requests: list[BatchRequest]) -> str:
+    """Run the task with the requests of a schema, in a worker's pool. Returns the state of the batch."""
+    task_id = uuid()
+    args = (requests,)
+    task.push_request(id=task_id, args=args, kwargs={}, headers={"_schema_name": schema_name})
+    state = FAILURE
+    try:
+        # Switches the schema, as if the task was run by the worker.
+        task_prerun.send(sender=task, task_id=task_id, task=task, args=args, kwargs={})
+        if getattr(task.request, "_tenant_migrating", None) is not None:
+            task.request._tenant_migrating = None
+            state = DEFERRED
+            return state
+
+        try:
+            task(requests)
+        except Exception as exc:
+            logger.exception("Batch of %d %s requests failed in schema %s: %r", len(requests), task.name, schema_name, exc)
+        else:
+            state = SUCCESS
+        return state
+    finally:
+        task_postrun.send(sender=task, task_id=task_id, task=task, args=args, kwargs={}, retval=None, state=state)
+        task.pop_request()
+
+
+class TenantBatches:
+    """Worker strategy buffering the messages of a batch task, by schema.
+
+    A schema's messages are sent to the pool once `flush_every` of them are
+    buffered, or after at most `flush_interval` seconds. They're acked
+    together when the batch is done.
+    """
+
+    def __init__(self, task: "TenantBatchTask", app, consumer, **kwargs) -> None:
+        from tenant_schemas_celery.compat import get_public_schema_name
+
+        self.task = task
+        self.app = app
+        self.consumer = consumer
+        self.public_schema_name = get_public_schema_name()
+        self._buffers: dict[str, list[_BufferedMessage]] = defaultdict(list)
+        self._timer = consumer.timer.call_repeatedly(task.flush_interval, self.flush_all)
+
+    def __call__(self, message, body, ack, reject, callbacks, **kwargs) -> None:
+        if body is None and "args" not in message.payload:
+            headers = message.headers
+            args, kwargs_, _ = message.decode()
+        else:
+            if "args" in message.payload:
+                (args, kwargs_, _), headers, _, _ = hybrid_to_proto2(message, message.payload)
+            else:
+                (args, kwargs_, _), headers, _, _ = proto1_to_proto2(message, body)
+
+        request = BatchRequest(
+            id=headers["id"],
+            args=tuple(args),
+            kwargs=kwargs_,
+            headers=headers,
+            delivery_info=message.delivery_info,
+        )
+        buffered = _BufferedMessage(request, ack, reject)
+        schema_name = headers.get("_schema_name") or self.public_schema_name
+
+        eta = self._eta(headers.get("eta"))
+        if eta is not None:
+            self.consumer.qos.increment_eventually()
+            self.consumer.timer.call_at(eta, self._add_delayed, (schema_name, buffered), priority=6)
+            return
+
+        self._add(schema_name, buffered)
+
+    def _eta(self, eta: Optional[str]) -> Optional[float]:
+        if not eta:
+            return None
+
+        eta = datetime.fromisoformat(eta)
+        if eta.tzinfo is None:
+            eta = eta.replace(tzinfo=self.app.timezone)
+        return eta.timestamp()
+
+    def _add_delayed(self, schema_name: str, buffered: _BufferedMessage) -> None:
+        self.consumer.qos.decrement_eventually()
+        self._add(schema_name, buffered)
+
+    def _add(self, schema_name: str, buffered: _BufferedMessage) -> None:
+        buffer = self._buffers[schema_name]
+        buffer.append(buffered)
+        if len(buffer) >= self.task.flush_every:
+            self.flush(schema_name)
+
+    def flush_all(self) -> None:
+        for schema_name in list(self._buffers):
+            self.flush(schema_name)
+
+    def flush(self, schema_name: str) -> None:
+        buffered = self._buffers.pop(schema_name, None)
+        if not buffered:
+            return
+
+        def on_done(state: str) -> None:
+            self._on_done(schema_name, buffered, state)
+
+        self.consumer.pool.apply_async(
+            _apply_batch,
+            args=(self.task, schema_name, [message.request for message in buffered]),
+            callback=on_done,
+        )
+
+    def _on_done(self, schema_name: str, buffered: list[_BufferedMessage], state: str) -> None:
+        if state == DEFERRED:
+            # Keep the messages unacknowledged until the migration is done.
+            self.consumer.timer.call_after(
+                self.task.tenant_migration_retry_delay, self._add_all, (schema_name, buffered)
+            )
+            return
+
+        connection_errors = self.consumer.connection_errors
+        for message in buffered:
+            if state == SUCCESS or self.task.acks_on_failure_or_timeout:
+                message.ack(logger, connection_errors)
+            else:
+                message.reject(logger, connection_errors, requeue=False)
+
+    def _add_all(self, schema_name: str, buffered: list[_BufferedMessage]) -> None:
+        for message in buffered:
+            self._add(schema_name, message)
+
+
+class TenantBatchTask(TenantTask):
+    """Task run with a list of `BatchRequest`s of the same schema, instead of a single message.
+
+    The schema is switched once per batch. Results aren't stored, and the task
+    isn't retried, a failed batch is logged and its messages are acked (see
+    `acks_on_failure_or_timeout`).
+    """
+
+    abstract = True
+    Strategy = "tenant_schemas_celery.batch:TenantBatches"
+    ignore_result = True
+
+    #: Maximum number of messages of a schema in a batch.
+    flush_every = 100
+    #: Maximum number of seconds a message waits for its batch to fill up.
+    flush_interval = 1.0
@@ -0,0 +1,80 @@
+from unittest.mock import Mock
+
+import pytest
+from django.db import connections
+
+from tenant_schemas_celery.app import CeleryApp
+from tenant_schemas_celery.batch import TenantBatches, TenantBatchTask
+from tenant_schemas_celery.test_tasks import RoutedTask
+
+
+class RoutedBatchTask(TenantBatchTask, RoutedTask):
+    abstract = True
+    flush_every = 2
+
+
+class FakeMessage:
+    def __init__(self, task_id: str, schema_name: str, *args) -> None:
+        self.payload = [list(args), {}, {}]
+        self.headers = {"id": task_id, "task": "batch", "_schema_name": schema_name}
+        self.delivery_info = {"routing_key": "celery"}
+        self.ack = Mock()
+        self.reject = Mock()
+
+    def decode(self):
+        return self.payload
+
+
+class FakePool:
+    def apply_async(self, target, args, callback):
+        callback(target(*args))
+
+
+@pytest.fixture
+def batches():
+    app = CeleryApp(set_as_current=False)
+    runs = []
+
+    @app.task(base=RoutedBatchTask, shared=False)
+    def batch(requests) -> None:
+        runs.append((connections["otherdb1"].schema_name, [request.args for request in requests]))
+
+    consumer = Mock(pool=FakePool())
+    yield TenantBatches(batch, app, consumer), runs
+    RoutedTask.resolved_schemas.clear()
+
+
+def test_messages_should_be_run_in_batches_of_their_schema(batches) -> None:
+    strategy, runs = batches
+    messages = [
+        FakeMessage("1", "tenant1", 1),
+        FakeMessage("2", "tenant2", 2),
+        FakeMessage("3", "tenant1", 3),
+        FakeMessage("4", "tenant2", 4),
+        FakeMessage("5", "tenant1", 5),
+    ]
+
+    for message in messages:
+        strategy(message, None, message.ack, message.reject, [])
+
+    assert runs == [("tenant1", [(1,), (3,)]), ("tenant2", [(2,), (4,)])]
+    assert [message.ack.called for message in messages] == [True, True, True, True, False]
+
+    strategy.flush_all()
+
+    assert runs[-1] == ("tenant1", [(5,)])
+    assert messages[-1].ack.called
+    assert connections["otherdb1"].schema_name == "public"
+
+
+def test_failed_batch_should_be_rejected(batches) -> None:
+    strategy, runs = batches
+    strategy.task.acks_on_failure_or_timeout = False
+    strategy.task.run = Mock(side_effect=ValueError)
+    messages = [FakeMessage("1", "tenant1", 1), FakeMessage("2", "tenant1", 2)]
+
+    for message in messages:
+        strategy(message, None, message.ack, message.reject, [])
+
+    assert all(message.reject.call_args.kwargs == {"requeue": False} for message in messages)
+    assert not any(message.ack.called for message in messages)
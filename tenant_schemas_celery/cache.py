@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
 
+from tenant_schemas_celery.metrics import metrics
+
 
 class _CacheEntry(object):
     def __init__(self, key, value, expires_at):
@@ -9,14 +11,25 @@ class _CacheEntry(object):
 
 
 class SimpleCache(object):
+    # Used as the `cache` label of the cache metrics.
+    metrics_name = "simple"
+
     def __init__(self, storage=None):
         self.__items = storage if storage is not None else {}
 
     def get(self, key, default):
-        if key not in self.__items or self.__items[key].expires_at < datetime.utcnow():
+        entry = self.__items.get(key)
+        if entry is None:
+            self._record("misses")
+            return default
+
+        if entry.expires_at < datetime.utcnow():
+            self._record("expirations")
+            self._record("misses")
             return default
 
-        return self.__items[key].value
+        self._record("hits")
+        return entry.value
 
     def set(self, key, value, expire_seconds):
         self.__items[key] = _CacheEntry(
@@ -24,3 +37,13 @@ class SimpleCache(object):
             value=value,
             expires_at=datetime.utcnow() + timedelta(seconds=expire_seconds),
         )
+
+    def delete(self, key):
+        self.__items.pop(key, None)
+
+    def clear(self):
+        self.__items.clear()
+
+    def _record(self, event):
+        if metrics.enabled:
+            metrics.increment(f"tenant_cache_{event}_total", cache=self.metrics_name)
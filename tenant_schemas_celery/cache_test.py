@@ -49,3 +49,24 @@ def test_cache_should_allow_reusing_storage():
     actual_value = cache2.get("some-key", "y")
 
     assert actual_value is expected_value
+
+
+def test_cache_delete_should_remove_value_from_cache():
+    cache = SimpleCache()
+    cache.set("some-key", "x", expire_seconds=1)
+
+    cache.delete("some-key")
+    cache.delete("non-existant-key")
+
+    assert cache.get("some-key", default=None) is None
+
+
+def test_cache_clear_should_remove_all_values_from_shared_storage():
+    storage = {}
+    cache = SimpleCache(storage=storage)
+    cache.set("key1", "x", expire_seconds=1)
+    cache.set("key2", "y", expire_seconds=1)
+
+    cache.clear()
+
+    assert storage == {}
@@ -1,8 +1,19 @@
-from django_tenants.test.cases import TenantTestCase
-from django_tenants.models import TenantMixin
 from django_tenants.utils import (
     get_public_schema_name,
     get_tenant_model,
     schema_context,
     tenant_context,
 )
+
+
+def __getattr__(name):
+    # Importing these needs the app registry to be ready, and pulls in django.test.
+    if name == "TenantTestCase":
+        from django_tenants.test.cases import TenantTestCase
+
+        return TenantTestCase
+    if name == "TenantMixin":
+        from django_tenants.models import TenantMixin
+
+        return TenantMixin
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+_current_schema: ContextVar[Optional[str]] = ContextVar("tenant_schemas_celery_current_schema", default=None)
+
+
+def get_current_schema() -> str:
+    """Return the schema selected for the current context, or else the default connection's schema.
+
+    Unlike the connection's schema, which is shared by every coroutine of a
+    thread, the context's schema is local to each coroutine.
+    """
+    schema_name = _current_schema.get()
+    if schema_name is not None:
+        return schema_name
+
+    from django.db import connection
+
+    return connection.schema_name
+
+
+def get_context_schema() -> Optional[str]:
+    """Return the schema selected for the current context, if any."""
+    return _current_schema.get()
+
+
+def set_current_schema(schema_name: Optional[str]):
+    return _current_schema.set(schema_name)
+
+
+def reset_current_schema(token) -> None:
+    _current_schema.reset(token)
+
+
+@contextmanager
+def current_schema(schema_name: str) -> Iterator[None]:
+    """Select the schema for the current context, i.e. of tasks sent from a coroutine."""
+    token = set_current_schema(schema_name)
+    try:
+        yield
+    finally:
+        reset_current_schema(token)
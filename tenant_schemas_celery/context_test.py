@@ -0,0 +1,19 @@
+import asyncio
+
+from tenant_schemas_celery.context import current_schema
+from tenant_schemas_celery.task import headers_with_schema
+
+
+def test_headers_should_use_the_schema_of_the_coroutine() -> None:
+    async def send(schema_name: str) -> str:
+        with current_schema(schema_name):
+            await asyncio.sleep(0.01)
+            # Tasks are published from a thread, which inherits the context.
+            headers = await asyncio.to_thread(headers_with_schema, None)
+        return headers["_schema_name"]
+
+    async def main() -> list[str]:
+        return await asyncio.gather(send("tenant1"), send("tenant2"))
+
+    assert asyncio.run(main()) == ["tenant1", "tenant2"]
+    assert headers_with_schema(None)["_schema_name"] == "public"
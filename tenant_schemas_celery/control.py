@@ -0,0 +1,88 @@
+from typing import Iterable, Optional
+
+from celery.signals import worker_init
+from celery.utils.functional import maybe_list
+from celery.worker.control import control_command, ok
+
+from tenant_schemas_celery.invalidation import tenant_cache_invalidations
+from tenant_schemas_celery.prewarm import prewarmed_tenants
+from tenant_schemas_celery.task import SharedTenantCache, SharedTenantDatabasesCache
+
+
+@control_command(
+    variadic="schema_names",
+    signature="[schema_name1 [schema_name2 [... [schema_nameN]]]]",
+)
+def invalidate_tenant_cache(state, schema_names=None, **kwargs):
+    """Evict tenants from the tenant cache. Evicts all tenants if no schema is given."""
+    schema_names = maybe_list(schema_names) or None
+
+    for cache in (SharedTenantCache(), SharedTenantDatabasesCache(), prewarmed_tenants):
+        if schema_names is None:
+            cache.clear()
+        else:
+            for schema_name in schema_names:
+                cache.delete(schema_name)
+
+    # Pool's child processes have their own copy of the cache.
+    tenant_cache_invalidations.publish(schema_names)
+    return ok(f"invalidated {'all tenants' if schema_names is None else len(schema_names)}")
+
+
+def broadcast_tenant_cache_invalidation(app, schema_names: Optional[Iterable[str]] = None, **kwargs):
+    """Ask all workers to evict given schemas (or all tenants) from their tenant cache."""
+    arguments = {} if schema_names is None else {"schema_names": list(schema_names)}
+    return app.control.broadcast("invalidate_tenant_cache", arguments=arguments, **kwargs)
+
+
+def connect_tenant_cache_invalidation(app, sender=None) -> None:
+    """Broadcast tenant cache invalidation whenever a tenant is saved or deleted.
+
+    Renamed tenants are invalidated under both their previous and new schema names.
+    Should be called once the django apps are ready, e.g. in `AppConfig.ready`.
+    """
+    from django.db import transaction
+    from django.db.models.signals import post_delete, post_save, pre_save
+
+    from tenant_schemas_celery.compat import get_tenant_model
+
+    def record_previous_schema_name(sender, instance, update_fields=None, **kwargs):
+        previous_schema_name = None
+        if not instance._state.adding and (update_fields is None or "schema_name" in update_fields):
+            previous_schema_name = (
+                sender._default_manager.filter(pk=instance.pk).values_list("schema_name", flat=True).first()
+            )
+        instance._tenant_cache_previous_schema_name = previous_schema_name
+
+    def invalidate(sender, instance, **kwargs):
+        schema_names = [instance.schema_name]
+        previous_schema_name = getattr(instance, "_tenant_cache_previous_schema_name", None)
+        if previous_schema_name is not None and previous_schema_name != instance.schema_name:
+            schema_names.append(previous_schema_name)
+        transaction.on_commit(
+            lambda: broadcast_tenant_cache_invalidation(app, schema_names)
+        )
+
+    sender = sender or get_tenant_model()
+    pre_save.connect(
+        record_previous_schema_name, sender=sender, weak=False,
+        dispatch_uid="tenant_schemas_record_previous_schema_name",
+    )
+    post_save.connect(
+        invalidate, sender=sender, weak=False,
+        dispatch_uid="tenant_schemas_invalidate_tenant_cache_on_save",
+    )
+    post_delete.connect(
+        invalidate, sender=sender, weak=False,
+        dispatch_uid="tenant_schemas_invalidate_tenant_cache_on_delete",
+    )
+
+
+def setup_tenant_cache_invalidations(**kwargs):
+    # Runs in the worker's main process, before the pool is forked.
+    tenant_cache_invalidations.setup()
+
+
+worker_init.connect(
+    setup_tenant_cache_invalidations, dispatch_uid="tenant_schemas_setup_tenant_cache_invalidations"
+)
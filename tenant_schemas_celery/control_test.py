@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from tenant_schemas_celery.compat import get_tenant_model
+from tenant_schemas_celery.control import (
+    broadcast_tenant_cache_invalidation,
+    connect_tenant_cache_invalidation,
+    invalidate_tenant_cache,
+)
+from tenant_schemas_celery.task import SharedTenantCache
+from tenant_schemas_celery.test_utils import ClientFactory
+
+
+def test_invalidate_tenant_cache_should_evict_given_schemas():
+    cache = SharedTenantCache()
+    cache.set("tenant1", "x", expire_seconds=10)
+    cache.set("tenant2", "y", expire_seconds=10)
+
+    invalidate_tenant_cache(state=None, schema_names=["tenant1"])
+
+    assert cache.get("tenant1", default=None) is None
+    assert cache.get("tenant2", default=None) == "y"
+    cache.clear()
+
+
+def test_invalidate_tenant_cache_should_evict_all_schemas_by_default():
+    cache = SharedTenantCache()
+    cache.set("tenant1", "x", expire_seconds=10)
+
+    invalidate_tenant_cache(state=None)
+
+    assert cache.get("tenant1", default=None) is None
+
+
+def test_broadcast_tenant_cache_invalidation_should_send_schema_names():
+    app = mock.Mock()
+
+    broadcast_tenant_cache_invalidation(app, ("tenant1",), reply=False)
+
+    app.control.broadcast.assert_called_once_with(
+        "invalidate_tenant_cache", arguments={"schema_names": ["tenant1"]}, reply=False
+    )
+
+
+def test_renamed_tenant_should_be_invalidated_under_both_names(transactional_db, client_factory: ClientFactory):
+    app = mock.Mock()
+    tenant = client_factory.create_client(
+        name="test_rename", schema_name="test_rename", domain_url="test_rename.test.com"
+    )
+    connect_tenant_cache_invalidation(app)
+    try:
+        tenant.schema_name = "test_renamed"
+        tenant.save()
+    finally:
+        # Only the tenant was renamed, its schema is dropped under its first name.
+        tenant.schema_name = "test_rename"
+        pre_save.disconnect(sender=get_tenant_model(), dispatch_uid="tenant_schemas_record_previous_schema_name")
+        post_save.disconnect(sender=get_tenant_model(), dispatch_uid="tenant_schemas_invalidate_tenant_cache_on_save")
+        post_delete.disconnect(
+            sender=get_tenant_model(), dispatch_uid="tenant_schemas_invalidate_tenant_cache_on_delete"
+        )
+
+    app.control.broadcast.assert_called_once_with(
+        "invalidate_tenant_cache", arguments={"schema_names": ["test_renamed", "test_rename"]}
+    )
@@ -1,11 +1,17 @@
 import json
 import logging
+from collections import defaultdict
+from time import monotonic, perf_counter
+from typing import Iterable, Iterator, Optional
 
+from django.db import DatabaseError, InterfaceError, close_old_connections, connections
 from django_celery_beat.models import PeriodicTask, PeriodicTasks
 from django_celery_beat.schedulers import DatabaseScheduler, ModelEntry
 
-from tenant_schemas_celery.compat import get_tenant_model, schema_context, get_public_schema_name, tenant_context
-from tenant_schemas_celery.scheduler import TenantAwareSchedulerMixin
+from tenant_schemas_celery.compat import get_tenant_model, schema_context, get_public_schema_name
+from tenant_schemas_celery.metrics import metrics
+from tenant_schemas_celery.readiness import tenant_readiness
+from tenant_schemas_celery.scheduler import TENANT_CHUNK_SIZE, TenantAwareSchedulerMixin, iter_schema_names
 
 logger = logging.getLogger(__name__)
 
@@ -16,32 +22,73 @@ def _task_schema(options: dict[str, object]) -> str:
     )
 
 
+def _record_reload(name: str, duration: float, schemas: int) -> None:
+    logger.debug("TenantAwareDatabaseScheduler: %s took %.3fs for %d schemas", name, duration, schemas)
+    if metrics.enabled:
+        metrics.observe(f"tenant_beat_{name}_seconds", duration)
+
+
 class TenantAwareModelEntry(ModelEntry):
+    @property
+    def tenant_schemas(self) -> Optional[tuple[str, ...]]:
+        """Schemas the entry is sent to, kept in its headers as `PeriodicTask` has no field for them."""
+        tenant_schemas = self.options.get("headers", {}).get("_tenant_schemas")
+        return tuple(tenant_schemas) if tenant_schemas is not None else None
+
+    @classmethod
+    def model_save_fields(cls) -> list[str]:
+        """The `save_fields` that are fields of the model, i.e. without the `no_changes` attribute."""
+        model_field_names = {field.name for field in PeriodicTask._meta.concrete_fields}
+        return [name for name in cls.save_fields if name in model_field_names]
+
+    def storage_schema(self) -> str:
+        """The schema the entry's periodic task is stored in."""
+        return _task_schema(self.options)
+
     def is_due(self) -> bool:
-        with schema_context(_task_schema(self.options)):
+        if not self._is_due_writes():
+            return super().is_due()
+
+        with schema_context(self.storage_schema()):
             return super().is_due()
 
+    def _is_due_writes(self) -> bool:
+        """Whether `is_due` is going to disable the task, saving it in its schema."""
+        model = self.model
+        if not model.enabled:
+            return False
+        if model.one_off and model.total_run_count > 0:
+            return True
+        return model.expires is not None and self._default_now() >= model.expires
+
     def save(self) -> None:
-        with schema_context(_task_schema(self.options)):
+        with schema_context(self.storage_schema()):
             super().save()
 
 
 class TenantAwarePeriodicTasks:
+    #: Number of tenants fetched at once.
+    chunk_size = TENANT_CHUNK_SIZE
+
     @classmethod
     def last_change(cls) -> bool:
+        started_at = perf_counter()
+        schemas = 1
         with schema_context(get_public_schema_name()):
-            all_tenants = list(get_tenant_model().objects.all())
-
             last_change = PeriodicTasks.last_change()
 
-        for tenant in all_tenants:
-            with tenant_context(tenant):
-                tenant_last_change = PeriodicTasks.last_change()
-                if last_change and tenant_last_change:
-                    last_change = max(last_change, tenant_last_change)
-                else:
-                    last_change = tenant_last_change
+            tenants = get_tenant_model().objects.exclude(schema_name=get_public_schema_name())
+            for schema_names in iter_schema_names(tenants, cls.chunk_size):
+                schemas += len(schema_names)
+                for schema_name in tenant_readiness.filter_ready(schema_names):
+                    with schema_context(schema_name):
+                        tenant_last_change = PeriodicTasks.last_change()
+                    if last_change and tenant_last_change:
+                        last_change = max(last_change, tenant_last_change)
+                    else:
+                        last_change = last_change or tenant_last_change
 
+        _record_reload("last_change", perf_counter() - started_at, schemas)
         return last_change
 
 
@@ -49,38 +96,329 @@ class TenantAwareDatabaseScheduler(TenantAwareSchedulerMixin, DatabaseScheduler)
     Entry = TenantAwareModelEntry
     Changes = TenantAwarePeriodicTasks
 
+    #: Maximum number of rows written by a single UPDATE statement on sync.
+    sync_batch_size = 1000
+    #: Number of tenants fetched at once when loading the schedule.
+    tenant_chunk_size = TENANT_CHUNK_SIZE
+    # Schemas skipped on the last reload, because they were being migrated.
+    _deferred_schemas: frozenset[str] = frozenset()
+
     def setup_schedule(self):
         self.install_default_entries(self.schedule)
-        self.update_from_dict(
-            self._tenant_aware_beat_schedule_to_dict(self.app.conf.beat_schedule)
-        )
+        entries = self._tenant_aware_beat_schedule_to_dict(self.app.conf.beat_schedule)
+        self._delete_per_schema_entries(entries)
+        self.update_from_dict(entries)
+        self.apply_catch_up_policy()
+
+    def _skip_missed_entry(self, entry: TenantAwareModelEntry) -> None:
+        # Written by the next sync, as entries are reloaded from the database.
+        entry.last_run_at = entry.model.last_run_at = entry._default_now()
+        self._dirty.add(entry.name)
+
+    def _tenant_aware_beat_schedule_to_dict(self, beat_schedule: dict[str, object]) -> dict[str, dict[str, object]]:
+        entries = super()._tenant_aware_beat_schedule_to_dict(beat_schedule)
+        for entry in entries.values():
+            tenant_schemas = entry.pop("tenant_schemas", None)
+            if tenant_schemas is not None:
+                # `PeriodicTask` has no field for them, see `TenantAwareModelEntry.tenant_schemas`.
+                entry["options"]["headers"]["_tenant_schemas"] = list(tenant_schemas)
+        return entries
+
+    def _delete_per_schema_entries(self, entries: dict[str, dict[str, object]]) -> None:
+        """Delete the periodic tasks stored once per schema by older versions, replaced by shared entries.
+
+        Their last run is carried over to the shared entry, which isn't sent again early.
+        """
+        per_schema_names = {}
+        for name, entry in entries.items():
+            for schema_name in entry["options"]["headers"].get("_tenant_schemas", ()):
+                per_schema_names[f"{name[:-len('@__tenant_schemas__')]}@{schema_name}"] = (name, entry["task"], schema_name)
+        if not per_schema_names:
+            return
+
+        with schema_context(get_public_schema_name()):
+            for periodic_task in PeriodicTask.objects.filter(name__in=per_schema_names):
+                name, task, schema_name = per_schema_names[periodic_task.name]
+                if (periodic_task.task, json.loads(periodic_task.headers or "{}").get("_schema_name")) != (task, schema_name):
+                    continue
+
+                entry = entries[name]
+                if periodic_task.last_run_at is not None and (
+                    entry.get("last_run_at") is None or periodic_task.last_run_at > entry["last_run_at"]
+                ):
+                    entry["last_run_at"] = periodic_task.last_run_at
+                    entry["total_run_count"] = periodic_task.total_run_count
+                periodic_task.delete()
+
+    def sync(self) -> None:
+        """Write the run times of reserved entries, with one bulk update per schema."""
+        if not self._dirty:
+            return
+
+        close_old_connections()
+        dirty, self._dirty = self._dirty, set()
+        models_by_schema = defaultdict(list)
+        for name in dirty:
+            entry = self._schedule.get(name) if self._schedule else None
+            if entry is not None:
+                models_by_schema[entry.storage_schema()].append(entry.model)
+
+        started_at = perf_counter()
+        for schema_name, models in models_by_schema.items():
+            try:
+                with schema_context(schema_name):
+                    type(models[0])._default_manager.bulk_update(
+                        models, self.Entry.model_save_fields(), batch_size=self.sync_batch_size
+                    )
+            except (DatabaseError, InterfaceError) as exc:
+                logger.exception("Database error while syncing schema %s: %r", schema_name, exc)
+                # Retry on next sync.
+                self._dirty.update(model.name for model in models)
+
+        _record_reload("sync", perf_counter() - started_at, len(models_by_schema))
 
     def enabled_models(self) -> list[PeriodicTask]:
+        started_at = perf_counter()
         models = []
         names_seen = {}
+        schemas = 0
         for schema_name in self.get_schema_names():
-            with schema_context(schema_name):
-                for task in super().enabled_models_qs():
-                    if previously_seen_schema := names_seen.get(task.name):
-                        raise ValueError(f"duplicate periodic task name: {task.name!r}. Previously seen in schema: {previously_seen_schema!r}.")
+            schemas += 1
+            for task in self.enabled_models_in_schema(schema_name):
+                if previously_seen_schema := names_seen.get(task.name):
+                    raise ValueError(f"duplicate periodic task name: {task.name!r}. Previously seen in schema: {previously_seen_schema!r}.")
+
+                models.append(task)
+                names_seen[task.name] = schema_name
 
-                    headers = json.loads(task.headers)
-                    headers.setdefault("_schema_name", schema_name)
-                    task.headers = json.dumps(headers)
-                    models.append(task)
-                    names_seen[task.name] = schema_name
+        _record_reload("enabled_models", perf_counter() - started_at, schemas)
+        return models
+
+    def enabled_models_in_schema(self, schema_name: str) -> list[PeriodicTask]:
+        with schema_context(schema_name):
+            models = list(super().enabled_models_qs())
 
+        for task in models:
+            headers = json.loads(task.headers)
+            headers.setdefault("_schema_name", schema_name)
+            task.headers = json.dumps(headers)
         return models
 
     def get_public_schema_name(self) -> list[str]:
         return [get_public_schema_name()]
 
-    def get_tenant_schema_names(self, exclude_schemas: list[str]) -> list[str]:
-        return list(get_tenant_model().objects.exclude(schema_name__in=exclude_schemas).values_list("schema_name", flat=True))
+    def get_tenant_schema_names(self, exclude_schemas: list[str]) -> Iterator[str]:
+        tenants = get_tenant_model().objects.exclude(schema_name__in=exclude_schemas)
+        deferred_schemas = set()
+        for schema_names in iter_schema_names(tenants, self.tenant_chunk_size):
+            # Tables of schemas being migrated might be locked, or not exist yet.
+            ready_schema_names = tenant_readiness.filter_ready(schema_names)
+            deferred_schemas.update(set(schema_names).difference(ready_schema_names))
+            yield from ready_schema_names
+        self._deferred_schemas = frozenset(deferred_schemas)
 
-    def get_schema_names(self) -> list[str]:
+    def schedule_changed(self) -> bool:
+        # Load the tasks of schemas that were skipped while being migrated.
+        if self._deferred_schemas and tenant_readiness.filter_ready(self._deferred_schemas):
+            return True
+        return super().schedule_changed()
+
+    def get_schema_names(self) -> Iterator[str]:
         public_schemas = self.get_public_schema_name()
-        return [
-            *public_schemas,
-            *self.get_tenant_schema_names(public_schemas),
-        ]
+        yield from public_schemas
+        yield from self.get_tenant_schema_names(public_schemas)
+
+
+CHANGES_CHANNEL = "tenant_schemas_celery_periodic_tasks"
+CHANGES_TRIGGER = "tenant_schemas_celery_notify_changes"
+
+
+def install_change_notifications(schema_names: Optional[Iterable[str]] = None, using: str = "default") -> None:
+    """Create triggers notifying beat about changed periodic tasks, in given schemas (all of them by default).
+
+    The triggers `NOTIFY` the `CHANGES_CHANNEL` channel with the schema's name
+    whenever django-celery-beat's `PeriodicTasks` table changes.
+    """
+    public_schema_name = get_public_schema_name()
+    if schema_names is None:
+        with schema_context(public_schema_name):
+            schema_names = [
+                public_schema_name,
+                *get_tenant_model().objects.exclude(schema_name=public_schema_name).values_list(
+                    "schema_name", flat=True
+                ),
+            ]
+
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    function_name = f"{quote_name(public_schema_name)}.{quote_name(CHANGES_TRIGGER)}"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION {function_name}() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('{CHANGES_CHANNEL}', TG_TABLE_SCHEMA);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+            """
+        )
+        for schema_name in schema_names:
+            table_name = f"{quote_name(schema_name)}.{quote_name(PeriodicTasks._meta.db_table)}"
+            cursor.execute(f"DROP TRIGGER IF EXISTS {quote_name(CHANGES_TRIGGER)} ON {table_name}")
+            cursor.execute(
+                f"CREATE TRIGGER {quote_name(CHANGES_TRIGGER)} AFTER INSERT OR UPDATE OR DELETE ON {table_name} "
+                f"FOR EACH STATEMENT EXECUTE PROCEDURE {function_name}()"
+            )
+
+
+def connect_change_notifications(using: str = "default") -> None:
+    """Install the change notification triggers in every schema, once it's migrated."""
+    from django_tenants.signals import schema_migrated
+
+    def install(sender, schema_name, **kwargs):
+        install_change_notifications([schema_name], using=using)
+
+    schema_migrated.connect(install, weak=False, dispatch_uid="tenant_schemas_install_change_notifications")
+
+
+class PeriodicTasksListener:
+    """Listens for the change notifications, on its own database connection."""
+
+    def __init__(self, using: str = "default", channel: str = CHANGES_CHANNEL) -> None:
+        self.using = using
+        self.channel = channel
+        self._connection = None
+
+    def _connect(self):
+        db_connection = connections[self.using]
+        connection = db_connection.get_new_connection(db_connection.get_connection_params())
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {db_connection.ops.quote_name(self.channel)}")
+        return connection
+
+    def poll(self) -> Optional[set[str]]:
+        """Return the schemas notified since the last poll.
+
+        Returns `None` after (re)connecting, as changes made in the meantime
+        weren't notified.
+        """
+        if self._connection is None:
+            try:
+                self._connection = self._connect()
+            except Exception as exc:
+                logger.warning("TenantAwareListeningDatabaseScheduler: Could not listen for changes: %r", exc)
+                return set()
+            return None
+
+        try:
+            if callable(self._connection.notifies):
+                # psycopg 3
+                notifies = list(self._connection.notifies(timeout=0))
+            else:
+                self._connection.poll()
+                notifies = list(self._connection.notifies)
+                self._connection.notifies.clear()
+        except Exception as exc:
+            logger.warning("TenantAwareListeningDatabaseScheduler: Could not receive notifications: %r", exc)
+            self.close()
+            return set()
+
+        return {notify.payload for notify in notifies}
+
+    def close(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+class TenantAwareListeningDatabaseScheduler(TenantAwareDatabaseScheduler):
+    """Database scheduler reloading the periodic tasks of schemas that notified a change.
+
+    Instead of polling the last change of every schema, beat listens for the
+    notifications of the triggers created by `install_change_notifications`.
+    The whole schedule is still reloaded every `fallback_interval` seconds, in
+    case notifications were missed (i.e. a schema without the trigger).
+    """
+
+    #: Seconds between full reloads of the schedule.
+    fallback_interval = 3600
+
+    def __init__(self, *args, **kwargs):
+        self._listener = PeriodicTasksListener()
+        self._last_full_reload = None
+        super().__init__(*args, **kwargs)
+
+    def get_fallback_interval(self) -> float:
+        interval = self.app.conf.get("beat_tenant_fallback_interval")
+        return self.fallback_interval if interval is None else interval
+
+    @property
+    def schedule(self):
+        initial = self._initial_read
+        changed_schemas = self._listener.poll()
+        full_reload = (
+            initial
+            or changed_schemas is None
+            or monotonic() - self._last_full_reload >= self.get_fallback_interval()
+        )
+        if not full_reload:
+            # Schemas skipped while they were being migrated.
+            changed_schemas.update(tenant_readiness.filter_ready(self._deferred_schemas))
+            if not changed_schemas:
+                return self._schedule
+
+        self.sync()
+        if full_reload:
+            self._initial_read = False
+            self._last_full_reload = monotonic()
+            self._schedule = self.all_as_schedule()
+        else:
+            logger.info("TenantAwareListeningDatabaseScheduler: Schedule changed in schemas: %s", changed_schemas)
+            self._schedule = self._reload_schemas(changed_schemas)
+
+        if not initial:
+            # The schedule changed, invalidate the heap in `Scheduler.tick`.
+            self._heap = []
+            self._heap_invalidated = True
+        return self._schedule
+
+    def _reload_schemas(self, schema_names: set[str]) -> dict[str, TenantAwareModelEntry]:
+        started_at = perf_counter()
+        schedule = {
+            name: entry for name, entry in self._schedule.items() if _task_schema(entry.options) not in schema_names
+        }
+        names_seen = {name: _task_schema(entry.options) for name, entry in schedule.items()}
+
+        ready_schema_names = tenant_readiness.filter_ready(schema_names)
+        self._deferred_schemas = self._deferred_schemas.difference(schema_names).union(
+            schema_names.difference(ready_schema_names)
+        )
+        for schema_name in ready_schema_names:
+            try:
+                models = self.enabled_models_in_schema(schema_name)
+            except DatabaseError:
+                # i.e. the schema has been dropped.
+                logger.warning("TenantAwareListeningDatabaseScheduler: Could not reload schema %s", schema_name)
+                continue
+
+            for model in models:
+                if previously_seen_schema := names_seen.get(model.name):
+                    raise ValueError(f"duplicate periodic task name: {model.name!r}. Previously seen in schema: {previously_seen_schema!r}.")
+
+                names_seen[model.name] = schema_name
+                try:
+                    schedule[model.name] = self.Entry(model, app=self.app)
+                except ValueError:
+                    pass
+
+        _record_reload("reload_schemas", perf_counter() - started_at, len(schema_names))
+        return schedule
+
+    def close(self):
+        super().close()
+        self._listener.close()
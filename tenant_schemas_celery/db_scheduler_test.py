@@ -1,12 +1,32 @@
 import json
+import time
+from datetime import timedelta
+
 import pytest
-from tenant_schemas_celery.db_scheduler import TenantAwareDatabaseScheduler
+from celery import schedules, uuid
+from django.db import connection
+from tenant_schemas_celery.app import CeleryApp
+from tenant_schemas_celery.db_scheduler import (
+    TenantAwareDatabaseScheduler,
+    TenantAwareListeningDatabaseScheduler,
+    install_change_notifications,
+)
 from django_celery_beat.models import PeriodicTask, IntervalSchedule, ClockedSchedule
 from tenant_schemas_celery.test_app import app
 from tenant_schemas_celery.test_utils import ClientFactory
 from tenant_schemas_celery.compat import tenant_context
 
 
+class FakeDatabaseScheduler(TenantAwareDatabaseScheduler):
+    def __init__(self, *args, **kwargs):
+        self.sent = []
+        super().__init__(*args, **kwargs)
+
+    def apply_async(self, entry, producer=None, advance=True, **kwargs):
+        self.sent.append((connection.schema_name, entry.options["headers"]))
+        return self.app.AsyncResult(uuid())
+
+
 @pytest.mark.usefixtures("transactional_db")
 def test_schedule_should_read_entries_from_public_schema() -> None:
     scheduler = TenantAwareDatabaseScheduler(app=app)
@@ -277,3 +297,125 @@ def test_schedule_should_properly_handle_one_off_tasks__tenant(client_factory: C
             break
     else:
         pytest.fail("task didn't disable itself after running one-off")
+
+
+@pytest.mark.usefixtures("transactional_db")
+def test_missed_entries_should_be_skipped_on_startup() -> None:
+    interval = IntervalSchedule.objects.get_or_create(every=1, period="minutes")[0]
+    task = PeriodicTask.objects.create(name="test_task_name@public", task="test_task", interval=interval)
+    # Missed during an hour of downtime.
+    PeriodicTask.objects.filter(pk=task.pk).update(last_run_at=app.now() - timedelta(hours=1))
+    beat_app = CeleryApp("test_app", set_as_current=False)
+    beat_app.conf.beat_tenant_catch_up = "skip"
+
+    scheduler = TenantAwareDatabaseScheduler(app=beat_app)
+
+    assert not scheduler.schedule[task.name].is_due().is_due
+    scheduler.sync()
+    task.refresh_from_db()
+    assert task.last_run_at > app.now() - timedelta(minutes=1)
+
+
+def test_sync_should_only_update_model_fields() -> None:
+    # `ModelEntry.save_fields` also lists the `no_changes` attribute, which `bulk_update` rejects.
+    fields = TenantAwareDatabaseScheduler.Entry.model_save_fields()
+
+    assert fields == ["last_run_at", "total_run_count"]
+    PeriodicTask.objects.bulk_update([], fields)
+
+
+@pytest.mark.usefixtures("transactional_db")
+def test_sync_should_update_each_schema_once(
+    client_factory: ClientFactory, django_assert_max_num_queries
+) -> None:
+    scheduler = TenantAwareDatabaseScheduler(app=app)
+    tenant = client_factory.create_client(
+        name="test_tenant", schema_name="test_tenant", domain_url="test_tenant.test.com"
+    )
+    with tenant_context(tenant):
+        tasks = [
+            PeriodicTask.objects.create(
+                name=f"test_task_name_{index}@test_tenant",
+                task="test_task",
+                interval=IntervalSchedule.objects.get_or_create(every=1, period="seconds")[0],
+            )
+            for index in range(3)
+        ]
+
+    schedule = scheduler.schedule
+    for task in tasks:
+        scheduler.reserve(schedule[task.name])
+
+    # Setting the search path and a single UPDATE.
+    with django_assert_max_num_queries(2):
+        scheduler.sync()
+
+    with tenant_context(tenant):
+        for task in tasks:
+            task.refresh_from_db()
+            assert task.total_run_count == 1
+
+
+@pytest.mark.usefixtures("transactional_db")
+def test_listening_scheduler_should_reload_notified_schema(client_factory: ClientFactory) -> None:
+    tenant = client_factory.create_client(
+        name="test_tenant", schema_name="test_tenant", domain_url="test_tenant.test.com"
+    )
+    install_change_notifications()
+    scheduler = TenantAwareListeningDatabaseScheduler(app=app)
+    public_task = PeriodicTask.objects.create(
+        name="test_task_name@public",
+        task="test_task",
+        interval=IntervalSchedule.objects.get_or_create(every=1, period="seconds")[0],
+    )
+    assert public_task.name in scheduler.schedule
+
+    with tenant_context(tenant):
+        PeriodicTask.objects.create(
+            name="test_task_name@test_tenant",
+            task="test_task",
+            interval=IntervalSchedule.objects.get_or_create(every=1, period="seconds")[0],
+        )
+
+    for _ in range(20):
+        if "test_task_name@test_tenant" in scheduler.schedule:
+            break
+        time.sleep(0.05)
+    else:
+        pytest.fail("notified schema wasn't reloaded")
+
+    assert public_task.name in scheduler.schedule
+    scheduler.close()
+
+
+@pytest.mark.usefixtures("transactional_db")
+def test_schedule_should_store_beat_schedule_entries_with_tenant_schemas(client_factory: ClientFactory) -> None:
+    for schema_name in ("tenant1", "tenant2", "tenant3"):
+        client_factory.create_client(name=schema_name, schema_name=schema_name, domain_url=f"{schema_name}.test.com")
+    # Stored once per schema by older versions.
+    PeriodicTask.objects.create(
+        name="test_task_name@tenant1",
+        task="test_task",
+        headers=json.dumps({"_schema_name": "tenant1"}),
+        interval=IntervalSchedule.objects.get_or_create(every=1, period="seconds")[0],
+    )
+    beat_app = CeleryApp("test_app", set_as_current=False)
+    beat_app.conf.beat_schedule = {
+        "test_task_name": {
+            "task": "test_task",
+            "schedule": schedules.crontab(minute="*"),
+            "tenant_schemas": ["tenant1", "tenant2"],
+            "options": {"headers": {"foo": "bar"}},
+        }
+    }
+
+    scheduler = FakeDatabaseScheduler(app=beat_app)
+    entry = scheduler.schedule["test_task_name@__tenant_schemas__"]
+    scheduler.apply_entry(entry)
+
+    assert entry.tenant_schemas == ("tenant1", "tenant2")
+    assert not PeriodicTask.objects.filter(name="test_task_name@tenant1").exists()
+    assert sorted(scheduler.sent) == [
+        ("tenant1", {"foo": "bar", "_schema_name": "tenant1"}),
+        ("tenant2", {"foo": "bar", "_schema_name": "tenant2"}),
+    ]
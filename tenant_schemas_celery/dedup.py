@@ -0,0 +1,123 @@
+import hashlib
+import heapq
+import json
+import threading
+from time import monotonic
+from typing import Optional
+
+from tenant_schemas_celery.metrics import metrics
+
+
+class InMemoryDedupStore:
+    """Keeps the keys in the process' memory, so only sends of the same process are deduplicated."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._items: dict[str, tuple[str, float]] = {}
+        # (expiry, key) of the items, soonest first, to drop expired items as they're passed.
+        self._expiries: list[tuple[float, str]] = []
+
+    def add(self, key: str, value: str, timeout: float) -> Optional[str]:
+        """Store the value, unless the key is present. Returns the present value, if any."""
+        now = monotonic()
+        with self._lock:
+            self._prune(now)
+            item = self._items.get(key)
+            if item is not None and item[1] > now:
+                return item[0]
+
+            self._items[key] = (value, now + timeout)
+            heapq.heappush(self._expiries, (now + timeout, key))
+            return None
+
+    def _prune(self, now: float) -> None:
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiries)
+            item = self._items.get(key)
+            # The key might have been stored again since.
+            if item is not None and item[1] == expires_at:
+                del self._items[key]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+
+class DjangoCacheDedupStore:
+    """Keeps the keys in a Django cache, deduplicating the sends of every process using it."""
+
+    def __init__(self, cache_alias: str = "default") -> None:
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+
+        return caches[self.cache_alias]
+
+    #: Attempts to store the key, when it expires between checking and reading it.
+    attempts = 3
+
+    def add(self, key: str, value: str, timeout: float) -> Optional[str]:
+        for _ in range(self.attempts):
+            if self.cache.add(key, value, timeout=timeout):
+                return None
+            present = self.cache.get(key)
+            if present is not None:
+                return present
+            # The key expired in the meantime, store it again.
+        return None
+
+    def delete(self, key: str) -> None:
+        self.cache.delete(key)
+
+
+STORES = {
+    "memory": InMemoryDedupStore,
+    "django": DjangoCacheDedupStore,
+}
+
+
+class TaskDeduplicator:
+    """Collapses sends of the same task, with the same arguments, in the same schema.
+
+    Only tasks with a dedup window (see `TenantTask.tenant_dedup_window`) are
+    deduplicated. A send is dropped when the same one was made less than the
+    window's seconds before, and the first send's result is returned instead.
+
+    Disabled until configured.
+    """
+
+    key_prefix = "tenant_schemas_celery:dedup:"
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.store = InMemoryDedupStore()
+
+    def configure(self, store="memory") -> None:
+        """Enable deduplication, with the `memory` or `django` (default cache) store, or a store instance."""
+        if isinstance(store, str):
+            if store not in STORES:
+                raise ValueError(f"Unknown dedup store {store!r}, expected one of: {', '.join(STORES)}")
+            store = STORES[store]()
+
+        self.store = store
+        self.enabled = True
+
+    def key(self, name: str, schema_name: str, args, kwargs) -> str:
+        arguments = json.dumps([args or (), kwargs or {}], sort_keys=True, default=repr)
+        digest = hashlib.sha1(arguments.encode(), usedforsecurity=False).hexdigest()
+        return f"{self.key_prefix}{schema_name}:{name}:{digest}"
+
+    def claim(self, key: str, task_id: str, window: float, schema_name: str) -> Optional[str]:
+        """Return the id of the task already sent with the key, or `None` if it's the first send."""
+        duplicate_id = self.store.add(key, task_id, window)
+        if duplicate_id is not None and metrics.enabled:
+            metrics.increment("tenant_task_deduplicated_total", schema=metrics.schema_label(schema_name))
+        return duplicate_id
+
+    def release(self, key: str) -> None:
+        self.store.delete(key)
+
+
+task_deduplicator = TaskDeduplicator()
@@ -0,0 +1,90 @@
+from unittest import mock
+
+import pytest
+
+from tenant_schemas_celery.app import CeleryApp
+from tenant_schemas_celery import dedup
+from tenant_schemas_celery.dedup import DjangoCacheDedupStore, InMemoryDedupStore, task_deduplicator
+
+
+@pytest.fixture(params=["memory", "django"])
+def deduplicator(request):
+    task_deduplicator.configure(store=request.param)
+    yield task_deduplicator
+    if isinstance(task_deduplicator.store, DjangoCacheDedupStore):
+        task_deduplicator.store.cache.clear()
+    task_deduplicator.enabled = False
+    task_deduplicator.store = InMemoryDedupStore()
+
+
+@pytest.fixture
+def app() -> CeleryApp:
+    return CeleryApp("test_app", broker="memory://", set_as_current=False)
+
+
+def test_duplicate_sends_should_be_collapsed(deduplicator, app: CeleryApp) -> None:
+    @app.task(shared=False, tenant_dedup_window=10)
+    def recalculate_stats(*args) -> None:
+        ...
+
+    first = recalculate_stats.delay(1)
+
+    assert recalculate_stats.delay(1).id == first.id
+    assert recalculate_stats.delay(2).id != first.id
+    assert recalculate_stats.apply_async((1,), headers={"_schema_name": "tenant1"}).id != first.id
+    assert recalculate_stats.apply_async((1,), dedup_window=0).id != first.id
+
+
+def test_sends_with_a_task_id_should_not_be_deduplicated(deduplicator, app: CeleryApp, monkeypatch) -> None:
+    sent = []
+    monkeypatch.setattr(app.amqp, "send_task_message", lambda producer, name, message, **kwargs: sent.append(message))
+
+    @app.task(shared=False, tenant_dedup_window=10)
+    def recalculate_stats(*args) -> None:
+        ...
+
+    first = recalculate_stats.delay(1)
+    # What `Task.retry` sends.
+    retry = recalculate_stats.apply_async((1,), task_id=first.id, countdown=5)
+
+    assert retry.id == first.id
+    assert len(sent) == 2
+
+
+def test_tasks_without_window_should_not_be_deduplicated(deduplicator, app: CeleryApp) -> None:
+    @app.task(shared=False)
+    def recalculate_stats(*args) -> None:
+        ...
+
+    assert recalculate_stats.delay(1).id != recalculate_stats.delay(1).id
+
+
+def test_unknown_store_should_be_rejected() -> None:
+    with pytest.raises(ValueError):
+        task_deduplicator.configure(store="redis")
+
+
+def test_memory_store_should_drop_expired_keys(monkeypatch) -> None:
+    store = InMemoryDedupStore()
+    monkeypatch.setattr(dedup, "monotonic", lambda: 0)
+    store.add("key1", "id1", timeout=10)
+    store.add("key2", "id2", timeout=20)
+
+    monkeypatch.setattr(dedup, "monotonic", lambda: 15)
+    assert store.add("key3", "id3", timeout=10) is None
+
+    assert set(store._items) == {"key2", "key3"}
+    assert store.add("key2", "id4", timeout=10) == "id2"
+
+
+def test_django_store_should_add_keys_expired_while_claiming() -> None:
+    store = DjangoCacheDedupStore()
+    cache = mock.Mock()
+    # The key is present when adding it, and expired when reading it.
+    cache.add.side_effect = [False, True]
+    cache.get.return_value = None
+
+    with mock.patch.object(DjangoCacheDedupStore, "cache", cache):
+        assert store.add("key", "id", timeout=10) is None
+
+    assert cache.add.call_count == 2
@@ -0,0 +1,92 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+from celery import current_task
+
+from tenant_schemas_celery.context import get_context_schema
+
+
+def capture_tenant_state(databases: Optional[Iterable[str]] = None) -> dict[str, tuple[object, bool]]:
+    """Return the tenant selected on each of the given databases.
+
+    Defaults to the databases switched for the currently running tenant task,
+    or the default database outside of tasks. The schema selected for the
+    current context, if any, is captured by name instead.
+    """
+    from django.db import connections
+
+    if databases is None:
+        old_schemas = getattr(current_task, "_old_schemas", None)
+        databases = tuple(old_schemas) if old_schemas else ("default",)
+
+    schema_name = get_context_schema()
+    if schema_name is not None:
+        return {db_name: (schema_name, True) for db_name in databases}
+
+    return {
+        db_name: (connections[db_name].tenant, connections[db_name].include_public_schema)
+        for db_name in databases
+    }
+
+
+def apply_tenant_state(tenant_state: dict[str, tuple[object, bool]]) -> None:
+    """Select captured tenants on the current thread's connections, where needed."""
+    from django.db import connections
+
+    for db_name, (tenant, include_public) in tenant_state.items():
+        db_connection = connections[db_name]
+        schema_name = tenant if isinstance(tenant, str) else tenant.schema_name
+        if (
+            db_connection.schema_name == schema_name
+            and db_connection.include_public_schema == include_public
+        ):
+            continue
+
+        if isinstance(tenant, str):
+            db_connection.set_schema(tenant, include_public=include_public)
+        else:
+            db_connection.set_tenant(tenant, include_public=include_public)
+
+
+class TenantThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool running submitted callables in the tenant it was created in.
+
+    The tenant is selected once on each worker thread's connections, when the
+    thread starts. Submitted callables also inherit the submitter's context
+    variables, i.e. the read-only task's database.
+    """
+
+    def __init__(self, max_workers=None, thread_name_prefix="", initializer=None, initargs=(), databases=None):
+        self._tenant_state = capture_tenant_state(databases)
+        self._tenant_initializer = initializer
+        super().__init__(
+            max_workers=max_workers,
+            thread_name_prefix=thread_name_prefix,
+            initializer=self._initialize_thread,
+            initargs=initargs,
+        )
+
+    def _initialize_thread(self, *initargs):
+        apply_tenant_state(self._tenant_state)
+        if self._tenant_initializer is not None:
+            self._tenant_initializer(*initargs)
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _call_in_tenant(tenant_state, func, /, *args, **kwargs):
+    apply_tenant_state(tenant_state)
+    return func(*args, **kwargs)
+
+
+async def to_tenant_thread(func, /, *args, **kwargs):
+    """Like `asyncio.to_thread`, but runs `func` in the current tenant."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(
+        contextvars.copy_context().run, _call_in_tenant, capture_tenant_state(), func, *args, **kwargs
+    )
+    return await loop.run_in_executor(None, call)
@@ -0,0 +1,58 @@
+import asyncio
+
+from django.db import connection, connections
+from django_tenants.utils import schema_context
+
+from tenant_schemas_celery.executor import TenantThreadPoolExecutor, to_tenant_thread
+from tenant_schemas_celery.routers import (
+    get_read_only_database,
+    reset_read_only_database,
+    set_read_only_database,
+)
+
+
+def get_schema_names() -> dict[str, str]:
+    return {db_name: connections[db_name].schema_name for db_name in ("default", "otherdb1")}
+
+
+def test_executor_should_run_callables_in_current_schema() -> None:
+    with schema_context("executor_tenant"):
+        executor = TenantThreadPoolExecutor(max_workers=2)
+
+    with executor:
+        result = executor.submit(get_schema_names).result()
+
+    assert result == {"default": "executor_tenant", "otherdb1": "public"}
+    assert connection.schema_name == "public"
+
+
+def test_executor_should_switch_given_databases() -> None:
+    connections["otherdb1"].set_schema("executor_tenant")
+    try:
+        executor = TenantThreadPoolExecutor(max_workers=1, databases=["otherdb1"])
+    finally:
+        connections["otherdb1"].set_schema_to_public()
+
+    with executor:
+        result = executor.submit(get_schema_names).result()
+
+    assert result == {"default": "public", "otherdb1": "executor_tenant"}
+
+
+def test_executor_should_propagate_context_variables() -> None:
+    token = set_read_only_database("otherdb2")
+    try:
+        with TenantThreadPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(get_read_only_database).result()
+    finally:
+        reset_read_only_database(token)
+
+    assert result == "otherdb2"
+
+
+def test_to_tenant_thread_should_run_callable_in_current_schema() -> None:
+    async def main() -> dict[str, str]:
+        with schema_context("async_tenant"):
+            return await to_tenant_thread(get_schema_names)
+
+    assert asyncio.run(main()) == {"default": "async_tenant", "otherdb1": "public"}
@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Modules imported by celery's worker and beat before Django is set up,
+# i.e. when the celery app module is loaded.
+EARLY_MODULES = (
+    "tenant_schemas_celery.aio",
+    "tenant_schemas_celery.app",
+    "tenant_schemas_celery.batch",
+    "tenant_schemas_celery.executor",
+    "tenant_schemas_celery.metrics",
+    "tenant_schemas_celery.pool",
+    "tenant_schemas_celery.scheduler",
+    "tenant_schemas_celery.sqlite_scheduler",
+)
+
+# Heavy modules that are only needed on first use.
+LAZY_MODULES = ("django.test", "django_celery_beat.models", "http.server")
+
+
+def _import_before_setup(module: str) -> list[str]:
+    """Import the module in a new interpreter, returning the lazy modules it imported."""
+    code = (
+        "import json, sys\n"
+        f"import {module}\n"
+        f"print(json.dumps([name for name in {LAZY_MODULES!r} if name in sys.modules]))\n"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(path for path in sys.path if path)}
+    env.setdefault("DJANGO_SETTINGS_MODULE", "test_app.settings")
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout)
+
+
+@pytest.mark.parametrize("module", EARLY_MODULES)
+def test_module_should_import_before_django_setup(module: str) -> None:
+    assert _import_before_setup(module) == []
@@ -0,0 +1,79 @@
+import ctypes
+import multiprocessing
+from typing import Iterable, Optional
+
+# Postgres identifiers are at most 63 bytes long, one more for the terminator.
+_SLOT_SIZE = 64
+_SLOTS = 128
+
+# Written in a slot to invalidate every cached tenant.
+_ALL_TENANTS = b""
+
+
+class TenantCacheInvalidationLog:
+    """Ring buffer of invalidated schema names, shared with forked processes.
+
+    Remote control commands are executed by the worker's main process, while
+    with the prefork pool tenants are cached in the pool's child processes. The
+    main process publishes invalidated schema names to a shared memory buffer
+    allocated before the pool is forked, and every process consumes the
+    entries it has not seen yet on its next cache lookup. Progress is tracked
+    per cache class, so several shared caches can consume the same log.
+
+    Until `setup` is called, invalidations only apply to the current process.
+    """
+
+    def __init__(self, slots: int = _SLOTS) -> None:
+        self.slots = slots
+        self._buffer = None
+        self._sequence = None
+        self._last_seen = {}
+
+    def setup(self) -> None:
+        if self._buffer is not None:
+            return
+
+        self._buffer = multiprocessing.RawArray(ctypes.c_char, self.slots * _SLOT_SIZE)
+        self._sequence = multiprocessing.RawValue(ctypes.c_ulonglong, 0)
+        self._last_seen = {}
+
+    def publish(self, schema_names: Optional[Iterable[str]]) -> None:
+        """Record invalidated schemas. `None` invalidates all tenants."""
+        if self._buffer is None:
+            return
+
+        encoded = [_ALL_TENANTS] if schema_names is None else [
+            schema_name.encode()[:_SLOT_SIZE - 1] for schema_name in schema_names
+        ]
+        for value in encoded:
+            sequence = self._sequence.value
+            offset = (sequence % self.slots) * _SLOT_SIZE
+            self._buffer[offset:offset + _SLOT_SIZE] = value.ljust(_SLOT_SIZE, b"\0")
+            self._sequence.value = sequence + 1
+
+    def consume(self, cache) -> None:
+        """Evict entries published since the last call from `cache`."""
+        if self._buffer is None:
+            return
+
+        sequence = self._sequence.value
+        last_seen = self._last_seen.get(type(cache), 0)
+        if sequence == last_seen:
+            return
+
+        if sequence - last_seen > self.slots:
+            # Too many invalidations since the last lookup, some were overwritten.
+            cache.clear()
+        else:
+            for position in range(last_seen, sequence):
+                offset = (position % self.slots) * _SLOT_SIZE
+                value = self._buffer[offset:offset + _SLOT_SIZE].split(b"\0", 1)[0]
+                if value == _ALL_TENANTS:
+                    cache.clear()
+                    break
+                cache.delete(value.decode())
+
+        self._last_seen[type(cache)] = sequence
+
+
+tenant_cache_invalidations = TenantCacheInvalidationLog()
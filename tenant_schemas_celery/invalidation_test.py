@@ -0,0 +1,78 @@
+import os
+
+from tenant_schemas_celery.cache import SimpleCache
+from tenant_schemas_celery.invalidation import TenantCacheInvalidationLog
+
+
+def test_consume_should_evict_published_schemas():
+    log = TenantCacheInvalidationLog()
+    log.setup()
+    cache = SimpleCache()
+    cache.set("tenant1", "x", expire_seconds=10)
+    cache.set("tenant2", "y", expire_seconds=10)
+
+    log.publish(["tenant1"])
+    log.consume(cache)
+
+    assert cache.get("tenant1", default=None) is None
+    assert cache.get("tenant2", default=None) == "y"
+
+
+def test_consume_should_clear_cache_when_all_tenants_invalidated():
+    log = TenantCacheInvalidationLog()
+    log.setup()
+    cache = SimpleCache()
+    cache.set("tenant1", "x", expire_seconds=10)
+
+    log.publish(None)
+    log.consume(cache)
+
+    assert cache.get("tenant1", default=None) is None
+
+
+def test_consume_should_clear_cache_when_log_overflows():
+    log = TenantCacheInvalidationLog(slots=2)
+    log.setup()
+    cache = SimpleCache()
+    cache.set("tenant1", "x", expire_seconds=10)
+
+    log.publish(["tenant2", "tenant3", "tenant4"])
+    log.consume(cache)
+
+    assert cache.get("tenant1", default=None) is None
+
+
+def test_consume_should_only_evict_unseen_entries():
+    log = TenantCacheInvalidationLog()
+    log.setup()
+    cache = SimpleCache()
+    log.publish(["tenant1"])
+    log.consume(cache)
+    cache.set("tenant1", "x", expire_seconds=10)
+
+    log.consume(cache)
+
+    assert cache.get("tenant1", default=None) == "x"
+
+
+def test_published_schemas_should_be_visible_in_forked_process():
+    log = TenantCacheInvalidationLog()
+    log.setup()
+    read_fd, write_fd = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - child process
+        os.close(write_fd)
+        os.read(read_fd, 1)
+        cache = SimpleCache()
+        cache.set("tenant1", "x", expire_seconds=10)
+        log.consume(cache)
+        os._exit(0 if cache.get("tenant1", default=None) is None else 1)
+
+    os.close(read_fd)
+    log.publish(["tenant1"])
+    os.write(write_fd, b"1")
+    os.close(write_fd)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
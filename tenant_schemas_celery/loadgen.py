@@ -0,0 +1,263 @@
+"""Multi-tenant load generator for measuring worker throughput.
+
+Publishes tenant tasks at a given rate, with a given tenant distribution and
+task mix, and reports throughput, latency, schema switches per task and the
+tenant cache hit rate:
+
+    $ DJANGO_SETTINGS_MODULE=myproject.settings python -m tenant_schemas_celery.loadgen --help
+
+By default, an embedded worker consumes the tasks from the in-memory transport.
+To test other pools, use the filesystem transport and run the worker separately,
+with the same `LOADGEN_*` environment variables:
+
+    $ export LOADGEN_TRANSPORT=filesystem LOADGEN_DATA_FOLDER=/tmp/loadgen LOADGEN_TENANT_CACHE_SECONDS=60
+    $ celery -A tenant_schemas_celery.loadgen:app worker -P prefork -c 8
+    $ python -m tenant_schemas_celery.loadgen --no-worker
+"""
+import argparse
+import bisect
+import itertools
+import os
+import random
+import statistics
+import time
+from typing import Callable, Optional
+
+from celery.signals import worker_init
+from django.db import connection
+
+from tenant_schemas_celery.app import CeleryApp
+from tenant_schemas_celery.metrics import metrics
+
+DISTRIBUTIONS = ("uniform", "zipf", "hot")
+
+
+def configure_app(app: CeleryApp, transport: str, data_folder: str, tenant_cache_seconds: int = 0) -> None:
+    app.conf.task_tenant_cache_seconds = tenant_cache_seconds
+    if transport == "memory":
+        app.conf.broker_url = "memory://"
+        app.conf.broker_transport_options = {"polling_interval": 0.001}
+        app.conf.result_backend = "cache+memory://"
+        return
+
+    for folder in ("queue", "processed", "results"):
+        os.makedirs(os.path.join(data_folder, folder), exist_ok=True)
+
+    app.conf.broker_url = "filesystem://"
+    app.conf.broker_transport_options = {
+        "data_folder_in": os.path.join(data_folder, "queue"),
+        "data_folder_out": os.path.join(data_folder, "queue"),
+        "processed_folder": os.path.join(data_folder, "processed"),
+        "polling_interval": 0.01,
+    }
+    app.conf.result_backend = f"file://{os.path.join(data_folder, 'results')}"
+
+
+app = CeleryApp("loadgen", set_as_current=False)
+configure_app(
+    app,
+    os.environ.get("LOADGEN_TRANSPORT", "memory"),
+    os.environ.get("LOADGEN_DATA_FOLDER", "/tmp/tenant-schemas-celery-loadgen"),
+    int(os.environ.get("LOADGEN_TENANT_CACHE_SECONDS", 0)),
+)
+
+
+@worker_init.connect
+def enable_metrics(**kwargs) -> None:
+    # Every process running the tasks reports its own counters.
+    metrics.configure([metrics.registry])
+
+
+def _measurement(published_at: float) -> dict[str, float]:
+    return {
+        "published_at": published_at,
+        "finished_at": time.time(),
+        "pid": os.getpid(),
+        "switches": metrics.registry.total("tenant_schema_switch_seconds"),
+        "skipped_switches": metrics.registry.total("tenant_schema_switch_skipped_total"),
+        "cache_hits": metrics.registry.get_counter("tenant_cache_hits_total", cache="tenant"),
+        "cache_misses": metrics.registry.get_counter("tenant_cache_misses_total", cache="tenant"),
+    }
+
+
+@app.task(name="loadgen.noop")
+def noop(published_at: float) -> dict[str, float]:
+    return _measurement(published_at)
+
+
+@app.task(name="loadgen.query")
+def query(published_at: float) -> dict[str, float]:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    return _measurement(published_at)
+
+
+@app.task(name="loadgen.sleep")
+def sleep(published_at: float, seconds: float = 0.005) -> dict[str, float]:
+    time.sleep(seconds)
+    return _measurement(published_at)
+
+
+TASKS = {"noop": noop, "query": query, "sleep": sleep}
+
+
+def parse_task_mix(value: str) -> dict[str, int]:
+    """Parse `noop=8,query=2` into task weights."""
+    task_mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in TASKS:
+            raise argparse.ArgumentTypeError(f"unknown task {name!r}, choose from: {', '.join(TASKS)}")
+        task_mix[name] = int(weight or 1)
+    return task_mix
+
+
+def schema_chooser(
+    schemas: list[str], distribution: str, rng: random.Random, zipf_s: float = 1.1, hot_share: float = 0.9
+) -> Callable[[], str]:
+    """Return a function picking schemas according to the distribution."""
+    if distribution == "uniform":
+        return lambda: rng.choice(schemas)
+
+    if distribution == "zipf":
+        cum_weights = list(itertools.accumulate(1 / (rank ** zipf_s) for rank in range(1, len(schemas) + 1)))
+        return lambda: schemas[bisect.bisect_left(cum_weights, rng.random() * cum_weights[-1])]
+
+    if distribution == "hot":
+        hot, others = schemas[0], schemas[1:] or schemas
+        return lambda: hot if rng.random() < hot_share else rng.choice(others)
+
+    raise ValueError(f"unknown distribution: {distribution!r}")
+
+
+def percentile(values: list[float], percent: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def summarize(measurements: list[dict[str, float]], duration: float) -> dict[str, float]:
+    latencies = sorted(m["finished_at"] - m["published_at"] for m in measurements)
+
+    # Counters are cumulative per process, so take the last value of every process.
+    last_per_process = {}
+    for measurement in measurements:
+        previous = last_per_process.get(measurement["pid"])
+        if previous is None or measurement["switches"] >= previous["switches"]:
+            last_per_process[measurement["pid"]] = measurement
+
+    def total(name: str) -> float:
+        return sum(measurement[name] for measurement in last_per_process.values())
+
+    lookups = total("cache_hits") + total("cache_misses")
+    return {
+        "tasks": len(measurements),
+        "duration": duration,
+        "throughput": len(measurements) / duration if duration else 0.0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p99": percentile(latencies, 99),
+        "switches_per_task": (total("switches") - total("skipped_switches")) / len(measurements) if measurements else 0.0,
+        "cache_hit_rate": total("cache_hits") / lookups if lookups else 0.0,
+    }
+
+
+def report(summary: dict[str, float]) -> str:
+    return "\n".join([
+        f"tasks: {summary['tasks']}, duration: {summary['duration']:.2f}s, "
+        f"throughput: {summary['throughput']:.1f} tasks/s",
+        f"latency p50: {summary['latency_p50'] * 1000:.2f}ms, p99: {summary['latency_p99'] * 1000:.2f}ms",
+        f"schema switches per task: {summary['switches_per_task']:.3f}",
+        f"tenant cache hit rate: {summary['cache_hit_rate']:.1%}",
+    ])
+
+
+def run(
+    schemas: list[str],
+    tasks: int,
+    rate: Optional[float],
+    distribution: str,
+    task_mix: dict[str, int],
+    sleep_seconds: float,
+    seed: Optional[int] = None,
+    **chooser_kwargs,
+) -> dict[str, float]:
+    rng = random.Random(seed)
+    choose_schema = schema_chooser(schemas, distribution, rng, **chooser_kwargs)
+    task_names, task_weights = list(task_mix), list(task_mix.values())
+
+    results = []
+    started_at = time.monotonic()
+    for index in range(tasks):
+        if rate:
+            delay = started_at + index / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        task = TASKS[rng.choices(task_names, weights=task_weights)[0]]
+        kwargs = {"seconds": sleep_seconds} if task is sleep else {}
+        results.append(task.apply_async(
+            args=(time.time(),), kwargs=kwargs, headers={"_schema_name": choose_schema()}
+        ))
+
+    measurements = [result.get(timeout=60) for result in results]
+    return summarize(measurements, time.monotonic() - started_at)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m tenant_schemas_celery.loadgen", description=__doc__.split("\n")[0])
+    parser.add_argument("--tasks", type=int, default=1000, help="number of tasks to publish")
+    parser.add_argument("--rate", type=float, default=None, help="tasks published per second (default: unlimited)")
+    parser.add_argument("--tenants", type=int, default=100, help="number of existing tenants to use")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="exponent of the zipf distribution")
+    parser.add_argument("--hot-share", type=float, default=0.9, help="share of tasks sent to the hot tenant")
+    parser.add_argument("--task-mix", type=parse_task_mix, default={"noop": 1}, help="i.e. noop=8,query=2,sleep=1")
+    parser.add_argument("--sleep-ms", type=float, default=5, help="duration of the sleep task")
+    parser.add_argument("--pool", default="solo", help="pool of the embedded worker: solo or threads")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--tenant-cache-seconds", type=int, default=app.conf.task_tenant_cache_seconds)
+    parser.add_argument("--no-worker", action="store_true", help="don't start the embedded worker")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    import django
+
+    django.setup()
+
+    from celery.contrib.testing.worker import start_worker
+
+    from tenant_schemas_celery.compat import get_public_schema_name, get_tenant_model
+
+    app.conf.task_tenant_cache_seconds = args.tenant_cache_seconds
+    enable_metrics()
+    schemas = list(
+        get_tenant_model().objects.exclude(schema_name=get_public_schema_name())
+        .order_by("schema_name").values_list("schema_name", flat=True)[:args.tenants]
+    )
+    if not schemas:
+        parser.error("no tenants found, create some first")
+
+    run_kwargs = dict(
+        schemas=schemas,
+        tasks=args.tasks,
+        rate=args.rate,
+        distribution=args.distribution,
+        task_mix=args.task_mix,
+        sleep_seconds=args.sleep_ms / 1000,
+        seed=args.seed,
+        zipf_s=args.zipf_s,
+        hot_share=args.hot_share,
+    )
+    if args.no_worker:
+        summary = run(**run_kwargs)
+    else:
+        with start_worker(
+            app, pool=args.pool, concurrency=args.concurrency, perform_ping_check=False, loglevel="WARNING"
+        ):
+            summary = run(**run_kwargs)
+
+    print(report(summary))
+
+
+if __name__ == "__main__":
+    main()
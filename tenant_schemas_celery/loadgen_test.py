@@ -0,0 +1,49 @@
+import argparse
+import random
+from collections import Counter
+
+import pytest
+
+from tenant_schemas_celery.loadgen import parse_task_mix, schema_chooser, summarize
+
+SCHEMAS = [f"tenant{index}" for index in range(10)]
+
+
+def test_parse_task_mix_should_return_weights() -> None:
+    assert parse_task_mix("noop=8,query") == {"noop": 8, "query": 1}
+
+
+def test_parse_task_mix_should_reject_unknown_tasks() -> None:
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_task_mix("unknown=1")
+
+
+def test_zipf_distribution_should_prefer_first_schemas() -> None:
+    choose = schema_chooser(SCHEMAS, "zipf", random.Random(0))
+
+    counts = Counter(choose() for _ in range(10_000))
+
+    assert counts["tenant0"] > counts["tenant1"] > counts["tenant9"]
+
+
+def test_hot_distribution_should_send_most_tasks_to_one_schema() -> None:
+    choose = schema_chooser(SCHEMAS, "hot", random.Random(0), hot_share=0.9)
+
+    counts = Counter(choose() for _ in range(10_000))
+
+    assert 0.85 < counts["tenant0"] / 10_000 < 0.95
+
+
+def test_summarize_should_use_last_counters_of_every_process() -> None:
+    measurements = [
+        {"published_at": 0, "finished_at": 0.1, "pid": 1, "switches": 1, "skipped_switches": 0, "cache_hits": 0, "cache_misses": 1},
+        {"published_at": 0, "finished_at": 0.2, "pid": 1, "switches": 2, "skipped_switches": 1, "cache_hits": 1, "cache_misses": 1},
+        {"published_at": 0, "finished_at": 0.3, "pid": 2, "switches": 1, "skipped_switches": 0, "cache_hits": 0, "cache_misses": 1},
+    ]
+
+    summary = summarize(measurements, duration=1.5)
+
+    assert summary["throughput"] == 2
+    assert summary["switches_per_task"] == pytest.approx(2 / 3)
+    assert summary["cache_hit_rate"] == pytest.approx(1 / 3)
+    assert summary["latency_p50"] == pytest.approx(0.2)
@@ -0,0 +1,207 @@
+import bisect
+import logging
+import socket
+import threading
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# Schemas over the cardinality limit are reported under this label.
+OTHER_SCHEMAS = "__other__"
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """In-memory metrics sink, keeping counters and histograms per label set."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, _Histogram]] = {}
+
+    def increment(self, name: str, value: float, labels: dict[str, str]) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counter = self._counters.setdefault(name, {})
+            counter[key] = counter.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: dict[str, str]) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histograms = self._histograms.setdefault(name, {})
+            if key not in histograms:
+                histograms[key] = _Histogram(self.buckets)
+            histograms[key].observe(value)
+
+    def get_counter(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def get_histogram(self, name: str, **labels: str) -> Optional[_Histogram]:
+        with self._lock:
+            return self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def total(self, name: str) -> float:
+        """Sum of a counter, or number of histogram observations, across all labels."""
+        with self._lock:
+            if name in self._histograms:
+                return sum(histogram.count for histogram in self._histograms[name].values())
+            return sum(self._counters.get(name, {}).values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, counter in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in counter.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+
+            for name, histograms in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in histograms.items():
+                    cumulative = 0
+                    for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    labels = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in key
+    )
+    return f"{{{labels}}}"
+
+
+class StatsdExporter:
+    """Metrics sink sending every measurement to a StatsD server over UDP.
+
+    Labels are sent as DogStatsD tags, or appended to the metric name when
+    `use_tags` is disabled.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 8125, prefix: str = "", use_tags: bool = True) -> None:
+        self.address = (host, port)
+        self.prefix = f"{prefix}." if prefix else ""
+        self.use_tags = use_tags
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def increment(self, name: str, value: float, labels: dict[str, str]) -> None:
+        self._send(name, f"{value}|c", labels)
+
+    def observe(self, name: str, value: float, labels: dict[str, str]) -> None:
+        self._send(name, f"{value * 1000:.3f}|ms", labels)
+
+    def _send(self, name: str, value: str, labels: dict[str, str]) -> None:
+        if self.use_tags:
+            tags = ",".join(f"{label}:{label_value}" for label, label_value in labels.items())
+            line = f"{self.prefix}{name}:{value}" + (f"|#{tags}" if tags else "")
+        else:
+            suffix = "".join(f".{label_value}" for label_value in labels.values())
+            line = f"{self.prefix}{name}{suffix}:{value}"
+
+        try:
+            self._socket.sendto(line.encode(), self.address)
+        except OSError:
+            logger.debug("Could not send metric %s to statsd", name, exc_info=True)
+
+
+def start_prometheus_server(port: int, addr: str = "", registry: Optional[MetricsRegistry] = None) -> "ThreadingHTTPServer":
+    """Serve the registry's metrics over HTTP in a daemon thread.
+
+    Every process has its own metrics, so with the prefork pool each child
+    needs its own port (or use the StatsD exporter instead).
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    registry = registry or metrics.registry
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class Metrics:
+    """Dispatches measurements to the configured sinks.
+
+    Disabled until a sink is added, so instrumented code only checks `enabled`.
+    The number of distinct schema labels is limited by `max_schemas`.
+    """
+
+    def __init__(self, max_schemas: int = 1000) -> None:
+        self.max_schemas = max_schemas
+        self.registry = MetricsRegistry()
+        self.sinks = []
+        self.enabled = False
+        self._schemas = set()
+
+    def configure(self, sinks: Iterable[object] = (), max_schemas: Optional[int] = None) -> None:
+        """Replace the sinks. Pass `metrics.registry` to keep metrics in memory."""
+        self.sinks = list(sinks)
+        self.enabled = bool(self.sinks)
+        if max_schemas is not None:
+            self.max_schemas = max_schemas
+        self._schemas = set()
+
+    def schema_label(self, schema_name: str) -> str:
+        if schema_name in self._schemas:
+            return schema_name
+        if len(self._schemas) >= self.max_schemas:
+            return OTHER_SCHEMAS
+        self._schemas.add(schema_name)
+        return schema_name
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        for sink in self.sinks:
+            sink.increment(name, value, labels)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        for sink in self.sinks:
+            sink.observe(name, value, labels)
+
+
+metrics = Metrics()
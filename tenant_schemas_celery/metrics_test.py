@@ -0,0 +1,171 @@
+import socket
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tenant_schemas_celery.cache import SimpleCache
+from tenant_schemas_celery.metrics import (
+    OTHER_SCHEMAS,
+    Metrics,
+    MetricsRegistry,
+    StatsdExporter,
+    metrics,
+    start_prometheus_server,
+)
+
+
+@pytest.fixture
+def registry():
+    metrics.configure([metrics.registry])
+    yield metrics.registry
+    metrics.registry.clear()
+    metrics.configure([])
+
+
+def test_registry_should_aggregate_counters_and_histograms() -> None:
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+
+    registry.increment("requests_total", 1, {"schema": "t1"})
+    registry.increment("requests_total", 2, {"schema": "t1"})
+    registry.observe("duration_seconds", 0.05, {"schema": "t1"})
+    registry.observe("duration_seconds", 5, {"schema": "t1"})
+
+    assert registry.get_counter("requests_total", schema="t1") == 3
+    histogram = registry.get_histogram("duration_seconds", schema="t1")
+    assert histogram.count == 2
+    assert histogram.counts == [1, 0, 1]
+
+
+def test_registry_total_should_sum_all_labels() -> None:
+    registry = MetricsRegistry()
+    registry.increment("requests_total", 1, {"schema": "t1"})
+    registry.increment("requests_total", 2, {"schema": "t2"})
+    registry.observe("duration_seconds", 0.05, {"schema": "t1"})
+    registry.observe("duration_seconds", 0.05, {"schema": "t2"})
+
+    assert registry.total("requests_total") == 3
+    assert registry.total("duration_seconds") == 2
+    assert registry.total("missing_total") == 0
+
+
+def test_registry_should_render_prometheus_text() -> None:
+    registry = MetricsRegistry(buckets=(0.1,))
+    registry.increment("requests_total", 1, {"schema": "t1"})
+    registry.observe("duration_seconds", 0.05, {})
+
+    assert registry.render_prometheus().splitlines() == [
+        "# TYPE requests_total counter",
+        'requests_total{schema="t1"} 1',
+        "# TYPE duration_seconds histogram",
+        'duration_seconds_bucket{le="0.1"} 1',
+        'duration_seconds_bucket{le="+Inf"} 1',
+        "duration_seconds_sum 0.05",
+        "duration_seconds_count 1",
+    ]
+
+
+def test_schema_label_should_limit_cardinality() -> None:
+    limited = Metrics(max_schemas=1)
+
+    assert limited.schema_label("t1") == "t1"
+    assert limited.schema_label("t2") == OTHER_SCHEMAS
+    assert limited.schema_label("t1") == "t1"
+
+
+def test_statsd_exporter_should_send_measurements() -> None:
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(1)
+    exporter = StatsdExporter("127.0.0.1", receiver.getsockname()[1], prefix="celery")
+
+    exporter.increment("hits_total", 1, {"cache": "tenant"})
+    exporter.observe("duration_seconds", 0.5, {})
+
+    assert receiver.recv(1024) == b"celery.hits_total:1|c|#cache:tenant"
+    assert receiver.recv(1024) == b"celery.duration_seconds:500.000|ms"
+    receiver.close()
+
+
+def test_prometheus_server_should_serve_registry() -> None:
+    registry = MetricsRegistry()
+    registry.increment("requests_total", 1, {})
+    server = start_prometheus_server(0, addr="127.0.0.1", registry=registry)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+            assert b"requests_total 1" in response.read()
+    finally:
+        server.shutdown()
+
+
+def test_cache_should_count_hits_misses_and_expirations(registry: MetricsRegistry) -> None:
+    cache = SimpleCache()
+    cache.set("fresh", "x", expire_seconds=10)
+    cache.set("expired", "y", expire_seconds=-1)
+
+    cache.get("fresh", None)
+    cache.get("expired", None)
+    cache.get("missing", None)
+
+    assert registry.get_counter("tenant_cache_hits_total", cache="simple") == 1
+    assert registry.get_counter("tenant_cache_misses_total", cache="simple") == 2
+    assert registry.get_counter("tenant_cache_expirations_total", cache="simple") == 1
+
+
+def test_switch_schema_should_record_switch_and_runtime(registry: MetricsRegistry) -> None:
+    from tenant_schemas_celery.app import CeleryApp, restore_schema, switch_schema
+    from tenant_schemas_celery.test_tasks import RoutedTask
+
+    app = CeleryApp(set_as_current=False)
+
+    @app.task(base=RoutedTask, shared=False)
+    def task() -> None:
+        ...
+
+    for schema_name in ("metrics_tenant", "public"):
+        task.push_request(headers={"_schema_name": schema_name})
+        try:
+            switch_schema(task, {})
+            restore_schema(task)
+        finally:
+            task.pop_request()
+
+    assert registry.get_histogram("tenant_schema_switch_seconds", schema="metrics_tenant").count == 1
+    assert registry.get_histogram("tenant_task_runtime_seconds", schema="metrics_tenant").count == 1
+    assert registry.get_histogram("tenant_schema_restore_seconds", schema="metrics_tenant").count == 1
+    assert registry.get_counter("tenant_schema_switch_skipped_total", schema="public") == 1
+
+
+def test_concurrent_requests_should_record_their_own_runtime(registry: MetricsRegistry) -> None:
+    from tenant_schemas_celery.app import CeleryApp, restore_schema, switch_schema
+    from tenant_schemas_celery.test_tasks import RoutedTask
+
+    app = CeleryApp(set_as_current=False)
+
+    @app.task(base=RoutedTask, shared=False)
+    def task() -> None:
+        ...
+
+    switched = threading.Barrier(2)
+
+    def run(schema_name: str) -> None:
+        task.push_request(headers={"_schema_name": schema_name})
+        try:
+            switch_schema(task, {})
+            # Both requests are running before either is done.
+            switched.wait(timeout=5)
+            restore_schema(task)
+        finally:
+            task.pop_request()
+
+    app.finalize()
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(run, ["metrics_tenant1", "metrics_tenant2"]))
+    finally:
+        RoutedTask.resolved_schemas.clear()
+
+    for schema_name in ("metrics_tenant1", "metrics_tenant2"):
+        assert registry.get_histogram("tenant_task_runtime_seconds", schema=schema_name).count == 1
+        assert registry.get_histogram("tenant_schema_restore_seconds", schema=schema_name).count == 1
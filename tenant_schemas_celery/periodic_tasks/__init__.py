@@ -0,0 +1,5 @@
+"""Stores the periodic tasks of every tenant in a single public schema table.
+
+Add `tenant_schemas_celery.periodic_tasks` to `SHARED_APPS` and run beat with
+`TenantAwareCentralizedDatabaseScheduler`.
+"""
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class PeriodicTasksConfig(AppConfig):
+    name = "tenant_schemas_celery.periodic_tasks"
+    label = "tenant_schemas_celery_periodic_tasks"
+    verbose_name = "Tenant periodic tasks"
+    default_auto_field = "django.db.models.AutoField"
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('django_celery_beat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantPeriodicTask',
+            fields=[
+                ('periodictask_ptr', models.OneToOneField(auto_created=True, on_delete=django.db.models.deletion.CASCADE, parent_link=True, primary_key=True, serialize=False, to='django_celery_beat.periodictask')),
+                ('schema_name', models.CharField(db_index=True, max_length=63)),
+            ],
+            options={
+                'verbose_name': 'tenant periodic task',
+                'verbose_name_plural': 'tenant periodic tasks',
+                'db_table': 'tenant_schemas_celery_periodictask',
+            },
+            bases=('django_celery_beat.periodictask',),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import connection, models
+from django_celery_beat.models import PeriodicTask
+from django_celery_beat.querysets import PeriodicTaskQuerySet
+
+from tenant_schemas_celery.compat import get_public_schema_name
+
+
+class TenantPeriodicTaskQuerySet(PeriodicTaskQuerySet):
+    def for_schema(self, schema_name: str) -> "TenantPeriodicTaskQuerySet":
+        return self.filter(schema_name=schema_name)
+
+
+class CurrentTenantManager(models.Manager.from_queryset(TenantPeriodicTaskQuerySet)):
+    """Only returns the periodic tasks of the schema the connection is set to."""
+
+    def get_queryset(self) -> TenantPeriodicTaskQuerySet:
+        return super().get_queryset().for_schema(connection.schema_name)
+
+
+class TenantPeriodicTask(PeriodicTask):
+    """A periodic task of the tenant with given schema, stored in the public schema.
+
+    Saved in the parent `PeriodicTask` table too, so that it's loaded (and
+    updated) along with the public schema's tasks. The schema defaults to the
+    one the connection is set to.
+    """
+
+    schema_name = models.CharField(max_length=63, db_index=True)
+
+    objects = TenantPeriodicTaskQuerySet.as_manager()
+    tenant_objects = CurrentTenantManager()
+
+    class Meta:
+        db_table = "tenant_schemas_celery_periodictask"
+        verbose_name = "tenant periodic task"
+        verbose_name_plural = "tenant periodic tasks"
+
+    def save(self, *args, **kwargs) -> None:
+        if not self.schema_name:
+            self.schema_name = getattr(connection, "schema_name", get_public_schema_name())
+        super().save(*args, **kwargs)
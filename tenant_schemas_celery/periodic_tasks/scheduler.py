@@ -0,0 +1,133 @@
+import json
+import logging
+from time import perf_counter
+from typing import Iterable, Optional
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django_celery_beat.models import PeriodicTask, PeriodicTasks
+
+from tenant_schemas_celery.compat import get_public_schema_name, get_tenant_model, schema_context
+from tenant_schemas_celery.db_scheduler import TenantAwareDatabaseScheduler, TenantAwareModelEntry, _record_reload
+from tenant_schemas_celery.periodic_tasks.models import TenantPeriodicTask
+from tenant_schemas_celery.readiness import tenant_readiness
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_FIELDS = ("interval", "crontab", "solar", "clocked")
+
+
+class CentralizedModelEntry(TenantAwareModelEntry):
+    def storage_schema(self) -> str:
+        return get_public_schema_name()
+
+
+class CentralizedPeriodicTasks:
+    @classmethod
+    def last_change(cls):
+        with schema_context(get_public_schema_name()):
+            return PeriodicTasks.last_change()
+
+
+class TenantAwareCentralizedDatabaseScheduler(TenantAwareDatabaseScheduler):
+    """Database scheduler reading the periodic tasks of every tenant from the public schema.
+
+    Tenants' tasks are `TenantPeriodicTask`s, sent to the schema they're
+    stored with. Tasks stored in tenants' own schemas are ignored, see
+    `import_tenant_periodic_tasks`. Loading the schedule and checking for
+    changes take a single query each.
+    """
+
+    Entry = CentralizedModelEntry
+    Changes = CentralizedPeriodicTasks
+
+    def enabled_models(self) -> list[PeriodicTask]:
+        started_at = perf_counter()
+        public_schema_name = get_public_schema_name()
+        with schema_context(public_schema_name):
+            tasks = list(self.enabled_models_qs().select_related("tenantperiodictask"))
+
+        schema_names = {}
+        for task in tasks:
+            try:
+                schema_names[task.name] = task.tenantperiodictask.schema_name
+            except ObjectDoesNotExist:
+                schema_names[task.name] = public_schema_name
+
+        # Tables of schemas being migrated might be locked, or not exist yet.
+        ready_schema_names = set(tenant_readiness.filter_ready(set(schema_names.values())))
+        self._deferred_schemas = frozenset(schema_names.values()).difference(ready_schema_names)
+
+        models = []
+        for task in tasks:
+            schema_name = schema_names[task.name]
+            if schema_name not in ready_schema_names:
+                continue
+
+            headers = json.loads(task.headers)
+            headers.setdefault("_schema_name", schema_name)
+            task.headers = json.dumps(headers)
+            models.append(task)
+
+        _record_reload("enabled_models", perf_counter() - started_at, len(ready_schema_names))
+        return models
+
+
+def _copy_schedule(schedule):
+    """Return the public schema's copy of a tenant's schedule, creating it if needed."""
+    if schedule is None:
+        return None
+
+    model = type(schedule)
+    fields = {
+        field.name: getattr(schedule, field.name) for field in model._meta.concrete_fields if not field.primary_key
+    }
+    return model.objects.filter(**fields).first() or model.objects.create(**fields)
+
+
+def import_tenant_periodic_tasks(schema_names: Optional[Iterable[str]] = None, delete: bool = False) -> int:
+    """Copy the periodic tasks stored in given tenants' schemas (all of them by default) to the public schema.
+
+    Tasks already imported (by name) are skipped, so it's safe to run again,
+    i.e. after new tenants were created by an older release. With `delete`,
+    the imported tasks are removed from the tenant's schema. Returns the
+    number of imported tasks.
+    """
+    public_schema_name = get_public_schema_name()
+    if schema_names is None:
+        with schema_context(public_schema_name):
+            schema_names = list(
+                get_tenant_model().objects.exclude(schema_name=public_schema_name).values_list("schema_name", flat=True)
+            )
+
+    copied_fields = [
+        field.name
+        for field in PeriodicTask._meta.concrete_fields
+        if not field.primary_key and field.name not in SCHEDULE_FIELDS
+    ]
+    imported = 0
+    for schema_name in schema_names:
+        with schema_context(schema_name):
+            tasks = list(PeriodicTask.objects.select_related(*SCHEDULE_FIELDS))
+
+        with schema_context(public_schema_name), transaction.atomic():
+            existing_names = set(
+                PeriodicTask.objects.filter(name__in=[task.name for task in tasks]).values_list("name", flat=True)
+            )
+            for task in tasks:
+                if task.name in existing_names:
+                    logger.info("Periodic task %r of schema %s has already been imported", task.name, schema_name)
+                    continue
+
+                TenantPeriodicTask(
+                    schema_name=schema_name,
+                    **{name: getattr(task, name) for name in copied_fields},
+                    **{name: _copy_schedule(getattr(task, name)) for name in SCHEDULE_FIELDS},
+                ).save()
+                imported += 1
+
+        if delete:
+            with schema_context(schema_name):
+                PeriodicTask.objects.filter(pk__in=[task.pk for task in tasks]).delete()
+
+    return imported
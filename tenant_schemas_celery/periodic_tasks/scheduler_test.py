@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from django_celery_beat.models import IntervalSchedule, PeriodicTask
+
+from tenant_schemas_celery.compat import schema_context, tenant_context
+from tenant_schemas_celery.periodic_tasks.models import TenantPeriodicTask
+from tenant_schemas_celery.periodic_tasks.scheduler import (
+    TenantAwareCentralizedDatabaseScheduler,
+    import_tenant_periodic_tasks,
+)
+from tenant_schemas_celery.test_app import app
+from tenant_schemas_celery.test_utils import ClientFactory
+
+
+@pytest.mark.usefixtures("transactional_db")
+def test_schedule_should_read_tenant_tasks_from_public_schema(
+    client_factory: ClientFactory, django_assert_max_num_queries
+) -> None:
+    client_factory.create_client(name="test_tenant", schema_name="test_tenant", domain_url="test_tenant.test.com")
+    interval = IntervalSchedule.objects.get_or_create(every=1, period="seconds")[0]
+    PeriodicTask.objects.create(name="test_task_name@public", task="test_task", interval=interval)
+    TenantPeriodicTask.objects.create(
+        name="test_task_name@test_tenant", task="test_task", interval=interval, schema_name="test_tenant"
+    )
+    assert [task.name for task in TenantPeriodicTask.tenant_objects.all()] == []
+    assert [task.name for task in TenantPeriodicTask.objects.for_schema("test_tenant")] == ["test_task_name@test_tenant"]
+
+    scheduler = TenantAwareCentralizedDatabaseScheduler(app=app)
+    # Setting the search path, a single SELECT, and prefetching schedules.
+    with django_assert_max_num_queries(6):
+        models = scheduler.enabled_models()
+
+    assert {model.name: json.loads(model.headers)["_schema_name"] for model in models} == {
+        "test_task_name@public": "public",
+        "test_task_name@test_tenant": "test_tenant",
+    }
+
+
+@pytest.mark.usefixtures("transactional_db")
+def test_tenant_tasks_should_be_imported(client_factory: ClientFactory) -> None:
+    tenant = client_factory.create_client(
+        name="test_tenant", schema_name="test_tenant", domain_url="test_tenant.test.com"
+    )
+    with tenant_context(tenant):
+        PeriodicTask.objects.create(
+            name="test_task_name@test_tenant",
+            task="test_task",
+            interval=IntervalSchedule.objects.get_or_create(every=5, period="minutes")[0],
+        )
+
+    assert import_tenant_periodic_tasks(delete=True) == 1
+    assert import_tenant_periodic_tasks() == 0
+
+    with schema_context("public"):
+        task = TenantPeriodicTask.objects.get(name="test_task_name@test_tenant")
+    assert (task.schema_name, task.interval.every, task.interval.period) == ("test_tenant", 5, "minutes")
+    with tenant_context(tenant):
+        assert not PeriodicTask.objects.filter(name="test_task_name@test_tenant").exists()
@@ -0,0 +1,123 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class PinnedConnections(NamedTuple):
+    """The connections replaced by the ones pinned to `schema_name`, by database."""
+
+    schema_name: str
+    previous: dict[str, object]
+
+
+class SchemaConnectionPool:
+    """Keeps database connections pinned to tenant schemas.
+
+    While a task runs, the connection pinned to its schema is swapped into
+    `django.db.connections`, so that switching to a schema used recently takes
+    no `SET search_path` round trip (with django-tenants'
+    `TENANT_LIMIT_SET_CALLS` setting). At most `max_connections` connections
+    are kept per worker process (or thread), the least recently used ones are
+    closed.
+
+    Pinned connections are closed on reuse once they're older than the
+    database's `CONN_MAX_AGE`, so it has to be set (`None` keeps them open).
+
+    Disabled until configured.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.max_connections = 4
+        self._local = threading.local()
+
+    def configure(self, max_connections: int = 4) -> None:
+        if max_connections < 1:
+            raise ValueError(f"max_connections must be positive, got {max_connections!r}")
+
+        self.max_connections = max_connections
+        self.enabled = True
+
+        from django.db import connections
+
+        closed_on_reuse = [alias for alias in connections if connections.settings[alias]["CONN_MAX_AGE"] == 0]
+        if closed_on_reuse:
+            logger.warning(
+                "Schema-pinned connections of databases %s are closed after every task, as their CONN_MAX_AGE is 0",
+                ", ".join(closed_on_reuse),
+            )
+
+    def _pool(self) -> "OrderedDict[tuple[str, str], object]":
+        if getattr(self._local, "pid", None) != os.getpid():
+            # Connections inherited from the parent process can't be used.
+            self._local.pid = os.getpid()
+            self._local.connections = OrderedDict()
+            self._local.in_use = {}
+        return self._local.connections
+
+    def pin(self, db_names: Iterable[str], schema_name: str) -> PinnedConnections:
+        """Swap the connections pinned to the schema into `django.db.connections`."""
+        from django.db import connections
+
+        pool = self._pool()
+        previous = {}
+        for db_name in db_names:
+            key = (db_name, schema_name)
+            connection = pool.pop(key, None)
+            if connection is None:
+                connection = connections.create_connection(db_name)
+            else:
+                connection.close_if_unusable_or_obsolete()
+            pool[key] = connection
+            self._local.in_use[key] = self._local.in_use.get(key, 0) + 1
+
+            previous[db_name] = connections[db_name]
+            connections[db_name] = connection
+
+        self._evict()
+        return PinnedConnections(schema_name, previous)
+
+    def unpin(self, pinned: PinnedConnections) -> None:
+        """Put back the connections replaced by `pin`."""
+        from django.db import connections
+
+        pool = self._pool()
+        for db_name, connection in pinned.previous.items():
+            key = (db_name, pinned.schema_name)
+            if key in pool:
+                pool.move_to_end(key)
+            in_use = self._local.in_use.get(key, 0) - 1
+            if in_use > 0:
+                self._local.in_use[key] = in_use
+            else:
+                self._local.in_use.pop(key, None)
+            connections[db_name] = connection
+
+        self._evict()
+
+    def _evict(self) -> None:
+        pool = self._local.connections
+        # Least recently used first. Connections in use are skipped, the limit is exceeded in the meantime.
+        for key in list(pool):
+            if len(pool) <= self.max_connections:
+                break
+            if key not in self._local.in_use:
+                pool.pop(key).close()
+
+    def schemas(self) -> list[tuple[str, str]]:
+        """The (database, schema) pairs having a pinned connection, least recently used first."""
+        return list(self._pool())
+
+    def close(self) -> None:
+        """Close the connections that aren't in use, i.e. on worker shutdown."""
+        pool = self._pool()
+        for key in list(pool):
+            if key not in self._local.in_use:
+                pool.pop(key).close()
+
+
+schema_connections = SchemaConnectionPool()
@@ -0,0 +1,104 @@
+import pytest
+from celery import signals, uuid
+from celery.app.trace import trace_task
+from celery.fixups.django import DjangoWorkerFixup
+from django.db import connections
+
+from tenant_schemas_celery.app import CeleryApp, restore_schema, switch_schema, switch_schema_after_django_fixup
+from tenant_schemas_celery.pool import schema_connections
+from tenant_schemas_celery.test_tasks import RoutedTask
+
+
+@pytest.fixture
+def pool():
+    schema_connections.configure(max_connections=2)
+    yield schema_connections
+    schema_connections.close()
+    schema_connections.enabled = False
+
+
+def test_configure_should_warn_about_connections_closed_on_reuse(pool, caplog) -> None:
+    schema_connections.configure(max_connections=2)
+
+    # The test settings keep the default CONN_MAX_AGE of 0.
+    assert "Schema-pinned connections of databases default, otherdb1, otherdb2 are closed" in caplog.text
+
+
+def test_least_recently_used_connection_should_be_closed(pool) -> None:
+    default = connections["default"]
+
+    pinned = pool.pin(["default"], "tenant1")
+    tenant1_connection = connections["default"]
+    assert tenant1_connection is not default
+    pool.unpin(pinned)
+    assert connections["default"] is default
+
+    for schema_name in ["tenant2", "tenant1", "tenant3"]:
+        pool.unpin(pool.pin(["default"], schema_name))
+
+    assert pool.schemas() == [("default", "tenant1"), ("default", "tenant3")]
+    pinned = pool.pin(["default"], "tenant1")
+    assert connections["default"] is tenant1_connection
+    pool.unpin(pinned)
+
+
+def test_connections_in_use_should_not_be_closed(pool) -> None:
+    outer = pool.pin(["default"], "tenant1")
+    inner = [pool.pin(["default"], schema_name) for schema_name in ["tenant2", "tenant3"]]
+
+    assert pool.schemas() == [("default", "tenant1"), ("default", "tenant2"), ("default", "tenant3")]
+
+    for pinned in reversed(inner):
+        pool.unpin(pinned)
+    pool.unpin(outer)
+    assert pool.schemas() == [("default", "tenant2"), ("default", "tenant1")]
+
+
+def test_task_should_run_on_pinned_connections(pool) -> None:
+    app = CeleryApp(set_as_current=False)
+
+    @app.task(base=RoutedTask, shared=False)
+    def task() -> None:
+        ...
+
+    otherdb1 = connections["otherdb1"]
+    task.push_request(headers={"_schema_name": "tenant1"}, called_directly=True)
+    try:
+        switch_schema(task, {})
+        assert connections["otherdb1"] is not otherdb1
+        assert connections["otherdb1"].schema_name == "tenant1"
+        assert otherdb1.schema_name == "public"
+
+        restore_schema(task)
+        assert connections["otherdb1"] is otherdb1
+    finally:
+        task.pop_request()
+        RoutedTask.resolved_schemas.clear()
+
+
+def test_pinned_connections_should_not_be_closed_by_the_django_fixup(pool, monkeypatch) -> None:
+    app = CeleryApp(set_as_current=False)
+
+    @app.task(shared=False)
+    def task() -> int:
+        return id(connections["default"])
+
+    closed = []
+    monkeypatch.setattr(type(connections["default"]), "close", lambda connection: closed.append(connection))
+    fixup = DjangoWorkerFixup(app).install()
+    try:
+        # Sent when the worker starts, after the fixup is installed.
+        switch_schema_after_django_fixup()
+        pinned_ids = [
+            trace_task(task, uuid(), (), {}, request={"headers": {"_schema_name": "public"}}, app=app).retval
+            for _ in range(2)
+        ]
+    finally:
+        signals.task_prerun.disconnect(fixup.on_task_prerun)
+        signals.task_postrun.disconnect(fixup.on_task_postrun)
+        signals.beat_embedded_init.disconnect(fixup.close_database)
+        signals.worker_process_init.disconnect(fixup.on_worker_process_init)
+
+    assert closed
+    assert pinned_ids[0] == pinned_ids[1]
+    assert pinned_ids[0] not in {id(connection) for connection in closed}
@@ -0,0 +1,119 @@
+import gc
+import logging
+from typing import Iterable, Optional
+
+from celery.signals import worker_init
+
+from tenant_schemas_celery.invalidation import tenant_cache_invalidations
+from tenant_schemas_celery.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PrewarmedTenants:
+    """Table of tenants loaded by the worker's main process, before the pool is forked.
+
+    Tenants are kept as rows of field values rather than model instances, and
+    the table is frozen out of the garbage collector's generations, so that
+    the pages shared copy-on-write by the pool's child processes stay clean.
+    Children build an instance from the row on lookup, and fall back to their
+    own cache for tenants created since the table was loaded. Invalidated
+    tenants are dropped from the table, see `invalidate_tenant_cache`.
+
+    The table is loaded with the worker app's `task_tenant_fields`, so that
+    tasks get the tenants they'd load themselves. Tasks opt out with
+    `TenantTask.tenant_prewarmed`, i.e. those overriding `get_tenant_queryset`.
+
+    Disabled until configured.
+    """
+
+    metrics_name = "prewarmed"
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.fields: Optional[tuple[str, ...]] = None
+        self._model = None
+        self._db = None
+        self._field_names: tuple[str, ...] = ()
+        self._rows: dict[str, tuple] = {}
+
+    def configure(self) -> None:
+        """Load the tenants when the worker starts."""
+        self.enabled = True
+
+    def load(self, queryset=None, fields: Optional[Iterable[str]] = None) -> int:
+        """Load the tenants of the queryset (all by default), returning their number.
+
+        Only `fields` (and the tenants' key and schema) are loaded, if given.
+        """
+        from tenant_schemas_celery.compat import get_tenant_model
+
+        if queryset is None:
+            queryset = get_tenant_model().objects.all()
+        self.fields = tuple(fields) if fields is not None else None
+        opts = queryset.model._meta
+        if self.fields is None:
+            field_names = [field.attname for field in opts.concrete_fields]
+        else:
+            field_names = [opts.pk.attname]
+            for name in ("schema_name", *self.fields):
+                attname = opts.get_field(name).attname
+                if attname not in field_names:
+                    field_names.append(attname)
+
+        schema_name_index = field_names.index(opts.get_field("schema_name").attname)
+        rows = {
+            row[schema_name_index]: row
+            for row in queryset.values_list(*field_names).iterator()
+        }
+        self._model, self._db, self._field_names, self._rows = queryset.model, queryset.db, tuple(field_names), rows
+        return len(rows)
+
+    def get(self, schema_name: str):
+        """Return a new instance of the tenant with given schema, or `None` if it isn't in the table."""
+        tenant_cache_invalidations.consume(self)
+        row = self._rows.get(schema_name)
+        if row is None:
+            self._record("misses")
+            return None
+
+        self._record("hits")
+        return self._model.from_db(self._db, self._field_names, row)
+
+    def delete(self, schema_name: str) -> None:
+        self._rows.pop(schema_name, None)
+
+    def clear(self) -> None:
+        self._rows.clear()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _record(self, event):
+        if metrics.enabled:
+            metrics.increment(f"tenant_cache_{event}_total", cache=self.metrics_name)
+
+
+prewarmed_tenants = PrewarmedTenants()
+
+
+def load_prewarmed_tenants(sender=None, **kwargs) -> None:
+    # Runs in the worker's main process, once Django is set up and before the pool is forked.
+    if not prewarmed_tenants.enabled:
+        return
+
+    from django.db import connections
+
+    # Fields of the app's tasks, see `TenantTask.get_tenant_fields`.
+    base_task = getattr(getattr(sender, "app", None), "Task", None)
+    fields = base_task.get_tenant_fields() if hasattr(base_task, "get_tenant_fields") else None
+    count = prewarmed_tenants.load(fields=fields)
+    # Children must not share the connection used to load the tenants.
+    connections.close_all()
+    # Objects allocated so far are left alone by collections, in this process and its children.
+    gc.collect()
+    gc.freeze()
+    logger.info("Prewarmed %s tenants", count)
+
+
+worker_init.connect(load_prewarmed_tenants, dispatch_uid="tenant_schemas_load_prewarmed_tenants")
@@ -0,0 +1,71 @@
+import gc
+from types import SimpleNamespace
+
+import pytest
+
+from tenant_schemas_celery.app import CeleryApp
+from tenant_schemas_celery.control import invalidate_tenant_cache
+from tenant_schemas_celery.prewarm import load_prewarmed_tenants, prewarmed_tenants
+from tenant_schemas_celery.task import SharedTenantCache
+from tenant_schemas_celery.test_utils import create_client
+
+
+@pytest.fixture
+def app() -> CeleryApp:
+    app = CeleryApp(set_as_current=False)
+    app.conf.task_tenant_fields = ("name",)
+    return app
+
+
+@pytest.fixture
+def prewarmed(app: CeleryApp):
+    prewarmed_tenants.configure()
+    yield prewarmed_tenants
+    prewarmed_tenants.enabled = False
+    prewarmed_tenants.clear()
+    SharedTenantCache().clear()
+    gc.unfreeze()
+
+
+def test_tenants_should_be_read_from_the_table(transactional_db, app, prewarmed, django_assert_num_queries):
+    @app.task(shared=False, tenant_cache_seconds=10)
+    def task() -> None:
+        ...
+
+    create_client(name="test_prewarm", schema_name="test_prewarm", domain_url="test_prewarm.test.com")
+    # Sent by the worker, with the fields of the app's tasks.
+    load_prewarmed_tenants(sender=SimpleNamespace(app=app))
+
+    with django_assert_num_queries(0):
+        tenant = task.get_tenant_for_schema("test_prewarm")
+    assert (tenant.schema_name, tenant.name) == ("test_prewarm", "test_prewarm")
+    assert "name" not in tenant.get_deferred_fields()
+    # Children keep sharing the table rather than caching their own tenants.
+    assert SharedTenantCache().get("test_prewarm", default=None) is None
+
+    # Tenants created since the table was loaded are fetched, and cached.
+    create_client(name="test_new", schema_name="test_new", domain_url="test_new.test.com")
+    with django_assert_num_queries(1):
+        assert task.get_tenant_for_schema("test_new").schema_name == "test_new"
+    assert SharedTenantCache().get("test_new", default=None) is not None
+
+
+def test_invalidated_tenants_should_be_dropped(transactional_db, prewarmed):
+    create_client(name="test_prewarm", schema_name="test_prewarm", domain_url="test_prewarm.test.com")
+    prewarmed.load()
+
+    invalidate_tenant_cache(state=None, schema_names=["test_prewarm"])
+
+    assert prewarmed.get("test_prewarm") is None
+
+
+def test_tasks_opting_out_should_not_read_the_table(transactional_db, app, prewarmed, django_assert_num_queries):
+    @app.task(shared=False, tenant_prewarmed=False)
+    def task() -> None:
+        ...
+
+    create_client(name="test_prewarm", schema_name="test_prewarm", domain_url="test_prewarm.test.com")
+    load_prewarmed_tenants(sender=SimpleNamespace(app=app))
+
+    with django_assert_num_queries(1):
+        assert task.get_tenant_for_schema("test_prewarm").schema_name == "test_prewarm"
@@ -0,0 +1,93 @@
+from typing import Iterable
+
+from tenant_schemas_celery.cache import SimpleCache
+
+
+class TenantReadinessIndex:
+    """Keeps track of the schemas whose migrations are running.
+
+    Schemas are marked as migrating on django-tenants' `schema_pre_migration`
+    signal, and as ready on `schema_migrated` (or `post_schema_sync`). The marks
+    are kept in a Django cache, so that beat and workers see migrations run by
+    other processes; it needs to be shared between them (i.e. redis or
+    memcached). Answers are cached in the process for `refresh_seconds`.
+
+    Disabled until configured, i.e. in `AppConfig.ready` of every process.
+    """
+
+    key_prefix = "tenant_schemas_celery:migrating:"
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.cache_alias = "default"
+        self.migration_timeout = 3600
+        self.refresh_seconds = 5
+        self._ready = SimpleCache()
+
+    def configure(self, cache_alias: str = "default", migration_timeout: int = 3600, refresh_seconds: int = 5) -> None:
+        """Enable the index.
+
+        Migrations that didn't finish (i.e. crashed) stop blocking their schema
+        after `migration_timeout` seconds.
+        """
+        from django_tenants.signals import post_schema_sync, schema_migrated, schema_pre_migration
+
+        self.cache_alias = cache_alias
+        self.migration_timeout = migration_timeout
+        self.refresh_seconds = refresh_seconds
+        self._ready.clear()
+        self.enabled = True
+
+        schema_pre_migration.connect(
+            self._on_pre_migration, weak=False, dispatch_uid="tenant_schemas_readiness_pre_migration"
+        )
+        schema_migrated.connect(self._on_migrated, weak=False, dispatch_uid="tenant_schemas_readiness_migrated")
+        post_schema_sync.connect(self._on_schema_sync, weak=False, dispatch_uid="tenant_schemas_readiness_sync")
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+
+        return caches[self.cache_alias]
+
+    def mark_migrating(self, schema_name: str) -> None:
+        self.cache.set(self.key_prefix + schema_name, True, timeout=self.migration_timeout)
+        self._ready.delete(schema_name)
+
+    def mark_ready(self, schema_name: str) -> None:
+        self.cache.delete(self.key_prefix + schema_name)
+        self._ready.delete(schema_name)
+
+    def is_ready(self, schema_name: str) -> bool:
+        return bool(self.filter_ready([schema_name]))
+
+    def filter_ready(self, schema_names: Iterable[str]) -> list[str]:
+        """Return the given schemas, without the ones being migrated."""
+        schema_names = list(schema_names)
+        if not self.enabled:
+            return schema_names
+
+        unknown = [schema_name for schema_name in schema_names if self._ready.get(schema_name, None) is None]
+        if unknown:
+            migrating = self.cache.get_many([self.key_prefix + schema_name for schema_name in unknown])
+            for schema_name in unknown:
+                self._ready.set(
+                    schema_name, self.key_prefix + schema_name not in migrating, expire_seconds=self.refresh_seconds
+                )
+
+        return [schema_name for schema_name in schema_names if self._ready.get(schema_name, True)]
+
+    def _on_pre_migration(self, sender, schema_name, **kwargs):
+        self.mark_migrating(schema_name)
+
+    def _on_migrated(self, sender, schema_name, **kwargs):
+        self.mark_ready(schema_name)
+
+    def _on_schema_sync(self, sender, tenant, **kwargs):
+        # `tenant` can be customized with the tenant model's `serializable_fields`.
+        schema_name = getattr(tenant, "schema_name", None)
+        if schema_name is not None:
+            self.mark_ready(schema_name)
+
+
+tenant_readiness = TenantReadinessIndex()
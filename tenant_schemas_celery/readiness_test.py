@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from celery.exceptions import Retry
+from django.db import connections
+from django_tenants.signals import schema_migrated, schema_pre_migration
+
+from tenant_schemas_celery.app import CeleryApp, restore_schema, switch_schema
+from tenant_schemas_celery.readiness import tenant_readiness
+from tenant_schemas_celery.test_tasks import RoutedTask
+
+
+@pytest.fixture
+def readiness():
+    tenant_readiness.configure(refresh_seconds=60)
+    yield tenant_readiness
+    tenant_readiness.mark_ready("tenant1")
+    tenant_readiness.enabled = False
+
+
+def test_disabled_index_should_report_all_schemas_ready() -> None:
+    assert tenant_readiness.filter_ready(["tenant1", "tenant2"]) == ["tenant1", "tenant2"]
+
+
+def test_migrating_schema_should_not_be_ready(readiness) -> None:
+    assert readiness.is_ready("tenant1")
+
+    schema_pre_migration.send(sender=None, schema_name="tenant1")
+
+    assert readiness.filter_ready(["tenant1", "tenant2"]) == ["tenant2"]
+
+    schema_migrated.send(sender=None, schema_name="tenant1")
+
+    assert readiness.filter_ready(["tenant1", "tenant2"]) == ["tenant1", "tenant2"]
+
+
+def test_task_of_migrating_schema_should_be_retried(readiness) -> None:
+    app = CeleryApp(set_as_current=False)
+
+    @app.task(base=RoutedTask, shared=False)
+    def task() -> None:
+        ...
+
+    readiness.mark_migrating("tenant1")
+    task.push_request(headers={"_schema_name": "tenant1"}, called_directly=True)
+    try:
+        switch_schema(task, {})
+
+        assert connections["otherdb1"].schema_name == "public"
+        assert "tenant1" not in task.resolved_schemas
+        with pytest.raises(Retry):
+            task.before_start("task-id", (), {})
+
+        restore_schema(task)
+        assert connections["otherdb1"].schema_name == "public"
+    finally:
+        task.pop_request()
+
+    # The next request runs normally.
+    task.before_start("task-id", (), {})
+
+
+def test_concurrent_requests_should_only_retry_the_migrating_schema(readiness) -> None:
+    app = CeleryApp(set_as_current=False)
+
+    @app.task(base=RoutedTask, shared=False)
+    def task() -> None:
+        ...
+
+    readiness.mark_migrating("tenant1")
+    switched = threading.Barrier(2)
+
+    def run(schema_name: str) -> bool:
+        task.push_request(headers={"_schema_name": schema_name})
+        try:
+            switch_schema(task, {})
+            # Both requests are switched before either one starts.
+            switched.wait(timeout=5)
+            try:
+                task.before_start("task-id", (), {})
+            except Retry:
+                return True
+            finally:
+                restore_schema(task)
+            return False
+        finally:
+            task.pop_request()
+
+    app.finalize()
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            retried = list(executor.map(run, ["tenant1", "tenant2"]))
+    finally:
+        RoutedTask.resolved_schemas.clear()
+
+    assert retried == [True, False]
@@ -0,0 +1,34 @@
+from contextvars import ContextVar
+from typing import Optional
+
+_read_only_database: ContextVar[Optional[str]] = ContextVar(
+    "tenant_schemas_celery_read_only_database", default=None
+)
+
+
+def get_read_only_database() -> Optional[str]:
+    """Return the database used by the currently running read-only task, if any."""
+    return _read_only_database.get()
+
+
+def set_read_only_database(db_name: Optional[str]):
+    return _read_only_database.set(db_name)
+
+
+def reset_read_only_database(token) -> None:
+    _read_only_database.reset(token)
+
+
+class TenantReadOnlyRouter:
+    """Routes queries of read-only tenant tasks to the replica database.
+
+    Writes are routed to the replica as well, so that they fail loudly instead
+    of silently landing in the primary's current schema.
+    Should be listed before other routers in `DATABASE_ROUTERS`.
+    """
+
+    def db_for_read(self, model, **hints):
+        return get_read_only_database()
+
+    def db_for_write(self, model, **hints):
+        return get_read_only_database()
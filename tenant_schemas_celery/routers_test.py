@@ -0,0 +1,22 @@
+from tenant_schemas_celery.routers import (
+    TenantReadOnlyRouter,
+    reset_read_only_database,
+    set_read_only_database,
+)
+
+
+def test_router_should_not_route_outside_of_read_only_tasks() -> None:
+    router = TenantReadOnlyRouter()
+
+    assert router.db_for_read(None) is None
+    assert router.db_for_write(None) is None
+
+
+def test_router_should_route_to_read_only_database() -> None:
+    router = TenantReadOnlyRouter()
+    token = set_read_only_database("replica")
+    try:
+        assert router.db_for_read(None) == "replica"
+        assert router.db_for_write(None) == "replica"
+    finally:
+        reset_read_only_database(token)
@@ -1,25 +1,50 @@
 import copy
 import logging
+from time import perf_counter
+from typing import TYPE_CHECKING, Iterator, Mapping, Optional
 
 from celery.beat import PersistentScheduler, ScheduleEntry, Scheduler
-from django_tenants.utils import get_tenant_model, schema_context, get_public_schema_name
-from django.db import models
+
+from tenant_schemas_celery.metrics import metrics
+from tenant_schemas_celery.readiness import tenant_readiness
+from tenant_schemas_celery.tiers import tenant_tiers
+from tenant_schemas_celery.signals import beat_tick_overrun
+
+if TYPE_CHECKING:
+    from django.db import models
 
 logger = logging.getLogger(__name__)
 
-Tenant = get_tenant_model()
+
+def __getattr__(name):
+    # The tenant model used to be resolved on import, which needs the app registry to be ready.
+    if name == "Tenant":
+        from tenant_schemas_celery.compat import get_tenant_model
+
+        return get_tenant_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class TenantAwareScheduleEntry(ScheduleEntry):
-    def __init__(self, *args, **kwargs):
+    #: Schemas the entry is sent to, or `None` to send it to all tenants.
+    tenant_schemas: Optional[tuple[str, ...]] = None
+
+    def __init__(self, *args, tenant_schemas=None, **kwargs):
         if args and len(args) == 9:
-            # Unpickled from database. Drop unused tenant_schemas field.
+            # Unpickled from an old database, with a positional tenant_schemas field.
+            # These per-schema entries are replaced when the schedule is merged.
             args = args[:-1]
-        else:
-            # Initialized from code. Drop unused tenant_schemas field.
-            kwargs.pop("tenant_schemas", None)
 
         super().__init__(*args, **kwargs)
+        if tenant_schemas is not None:
+            self.tenant_schemas = tuple(tenant_schemas)
+
+    def update(self, other):
+        super().update(other)
+        self.tenant_schemas = other.tenant_schemas
+
+    def editable_fields_equal(self, other):
+        return super().editable_fields_equal(other) and self.tenant_schemas == other.tenant_schemas
 
     def __reduce__(self):
         """Needed for Pickle serialization"""
@@ -32,73 +57,288 @@ class TenantAwareScheduleEntry(ScheduleEntry):
             self.args,
             self.kwargs,
             self.options,
-        )
+        ), {"tenant_schemas": self.tenant_schemas}
+
+
+CATCH_UP_POLICIES = ("collapse", "skip", "spread")
+
+#: Number of tenants fetched at once when iterating over them.
+TENANT_CHUNK_SIZE = 2000
+
+
+def iter_schema_names(queryset: "models.QuerySet", chunk_size: int = TENANT_CHUNK_SIZE) -> Iterator[list[str]]:
+    """Yield the schema names of the queryset's tenants in chunks, streamed with a server-side cursor."""
+    chunk = []
+    for schema_name in queryset.values_list("schema_name", flat=True).iterator(chunk_size=chunk_size):
+        chunk.append(schema_name)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
 
 class TenantAwareSchedulerMixin:
+    # Stats of the last entry sent to tenants, reported when a tick overruns.
+    _last_entry_stats: Optional[dict[str, object]] = None
+    # Stats of the entries sent during the current tick, reported when it overruns.
+    _tick_entry_stats: Optional[list[dict[str, object]]] = None
+    #: Number of tenants fetched at once when sending an entry.
+    tenant_chunk_size = TENANT_CHUNK_SIZE
+    # Names of entries missed during downtime, to be spread over the catch-up window.
+    _spread_entries: frozenset[str] = frozenset()
+
     @classmethod
-    def get_queryset(cls) -> models.QuerySet:
-        return Tenant.objects.all()
+    def get_queryset(cls) -> "models.QuerySet":
+        from tenant_schemas_celery.compat import get_tenant_model
+
+        return get_tenant_model().objects.all()
+
+    def get_tick_budget(self) -> float:
+        """Seconds a single tick may take before it's reported as an overrun."""
+        budget = self.app.conf.get("beat_tenant_tick_budget")
+        return self.max_interval if budget is None else budget
+
+    def get_catch_up_policy(self) -> str:
+        """How entries that became due while beat wasn't running are sent, on startup."""
+        policy = self.app.conf.get("beat_tenant_catch_up") or "collapse"
+        if policy not in CATCH_UP_POLICIES:
+            raise ValueError(f"unknown catch-up policy: {policy!r}, choose from: {', '.join(CATCH_UP_POLICIES)}")
+        return policy
+
+    def get_catch_up_window(self) -> float:
+        """Seconds over which the tenants of a missed entry are spread."""
+        window = self.app.conf.get("beat_tenant_catch_up_window")
+        return 300.0 if window is None else window
+
+    def setup_schedule(self):
+        super().setup_schedule()
+        self.apply_catch_up_policy()
+
+    def apply_catch_up_policy(self) -> None:
+        policy = self.get_catch_up_policy()
+        if policy == "collapse":
+            # Like celery, send every missed entry once, to all of its tenants at once.
+            return
+
+        missed = [entry for entry in self.schedule.values() if entry.is_due().is_due]
+        if missed:
+            logger.info(
+                "TenantAwareScheduler: Applying %s catch-up policy to missed entries: %s",
+                policy,
+                ", ".join(entry.name for entry in missed),
+            )
+
+        if policy == "skip":
+            for entry in missed:
+                self._skip_missed_entry(entry)
+        else:
+            self._spread_entries = frozenset(entry.name for entry in missed)
+
+    def _skip_missed_entry(self, entry: ScheduleEntry) -> None:
+        entry.last_run_at = entry.default_now()
+
+    def _catch_up_countdowns(self, entry: ScheduleEntry, tenants: int) -> Optional[list[float]]:
+        if entry.name not in self._spread_entries:
+            return None
+
+        self._spread_entries -= {entry.name}
+        window = self.get_catch_up_window()
+        return [window * index / tenants for index in range(tenants)]
+
+    def tick(self, *args, **kwargs):
+        self._tick_entry_stats = []
+        started_at = perf_counter()
+        try:
+            return super().tick(*args, **kwargs)
+        finally:
+            duration = perf_counter() - started_at
+            # Slowest entries first. The rest of the tick is spent syncing and scheduling.
+            entry_stats = sorted(
+                self._tick_entry_stats,
+                key=lambda stats: stats["query_seconds"] + stats["send_seconds"],
+                reverse=True,
+            )
+            self._tick_entry_stats = None
+            if metrics.enabled:
+                metrics.observe("tenant_beat_tick_seconds", duration)
+
+            budget = self.get_tick_budget()
+            if budget and duration > budget:
+                logger.warning(
+                    "TenantAwareScheduler: Tick took %.3fs, over its budget of %.3fs. Entries sent: %s",
+                    duration,
+                    budget,
+                    entry_stats,
+                    extra={"duration": duration, "budget": budget, "entry_stats": entry_stats},
+                )
+                beat_tick_overrun.send(sender=self, duration=duration, budget=budget, entry_stats=entry_stats)
 
     def _tenant_aware_beat_schedule_to_dict(self, beat_schedule: dict[str, object]) -> dict[str, dict[str, object]]:
+        """Turn `beat_schedule` into a single entry per task, shared by all of its tenants.
+
+        The task, schedule and options aren't copied per schema, so the schedule
+        grows with the number of tasks, not with the number of tenants.
+        """
         result = {}
-        for name, entry in copy.deepcopy(beat_schedule).items():
+        for name, entry in beat_schedule.items():
+            entry = dict(entry)
             tenant_schemas = entry.pop("tenant_schemas", None)
+            options = entry["options"] = dict(entry.get("options") or {})
+            headers = options["headers"] = dict(options.get("headers") or {})
             if tenant_schemas is None:
-                schema_name = '__all_tenants_only__'
-                entry.setdefault("options", {}).setdefault("headers", {})["_all_tenants_only"] = True
-                result[f"{name}@{schema_name}"] = entry
+                headers["_all_tenants_only"] = True
+                result[f"{name}@__all_tenants_only__"] = entry
             else:
-                for schema_name in tenant_schemas:
-                    entry.setdefault("options", {}).setdefault("headers", {})["_schema_name"] = schema_name
-                    result[f"{name}@{schema_name}"] = copy.deepcopy(entry)
+                # The schema header is added when sending to each tenant.
+                headers.pop("_schema_name", None)
+                entry["tenant_schemas"] = tuple(dict.fromkeys(tenant_schemas))
+                result[f"{name}@__tenant_schemas__"] = entry
 
         return result
 
+    def _migrate_per_schema_entries(
+        self, entries: dict[str, dict[str, object]], schedule: Optional[Mapping[str, object]] = None
+    ) -> None:
+        """Carry the last run of entries persisted once per schema over to the shared entries."""
+        schedule = self.schedule if schedule is None else schedule
+        for key, entry in entries.items():
+            if entry.get("tenant_schemas") is None or key in schedule:
+                continue
+
+            name = key[:-len("@__tenant_schemas__")]
+            previous = [
+                schedule[f"{name}@{schema_name}"]
+                for schema_name in entry["tenant_schemas"]
+                if f"{name}@{schema_name}" in schedule
+            ]
+            if previous:
+                latest = max(previous, key=lambda previous_entry: previous_entry.last_run_at)
+                entry["last_run_at"] = latest.last_run_at
+                entry["total_run_count"] = latest.total_run_count
+
     def apply_entry(self, entry: ScheduleEntry, producer=None):
         """
         See https://github.com/celery/celery/blob/c571848023be732a1a11d46198cf831a522cfb54/celery/beat.py#L277
         """
+        from tenant_schemas_celery.compat import get_public_schema_name, schema_context
 
+        started_at = perf_counter()
         tenants = self.get_queryset()
 
-        send_to_all_tenants = entry.options.setdefault("headers", {}).get("_all_tenants_only")
+        headers = entry.options.setdefault("headers", {})
+        send_to_all_tenants = headers.get("_all_tenants_only")
         if send_to_all_tenants:
-            schemas = list(tenants.exclude(schema_name=get_public_schema_name()).values_list("schema_name", flat=True))
+            tenants = tenants.exclude(schema_name=get_public_schema_name())
         else:
-            schemas = list(tenants.filter(schema_name=entry.options["headers"]["_schema_name"]).values_list("schema_name", flat=True))
+            tenant_schemas = getattr(entry, "tenant_schemas", None) or (
+                headers.get("_schema_name", get_public_schema_name()),
+            )
+            tenants = tenants.filter(schema_name__in=tenant_schemas)
+
+        # Entries loaded from the database carry the schema they're stored in, and
+        # their list of schemas. Each send gets the schema it's sent to instead.
+        send_headers = None
+        if "_schema_name" in headers or "_tenant_schemas" in headers:
+            send_headers = {
+                name: value for name, value in headers.items() if name not in ("_schema_name", "_tenant_schemas")
+            }
+
+        countdowns = None
+        if entry.name in self._spread_entries:
+            countdowns = self._catch_up_countdowns(entry, tenants.count())
 
         logger.info(
             "TenantAwareScheduler: Sending due task %s (%s) to %s tenants",
             entry.name,
             entry.task,
-            "all" if send_to_all_tenants else str(len(schemas)),
+            "all" if send_to_all_tenants else str(len(tenant_schemas)),
         )
 
-        for schema in schemas:
-            with schema_context(schema):
-                logger.debug(
-                    "Sending due task %s (%s) to tenant %s",
-                    entry.name,
-                    entry.task,
-                    schema,
-                )
-                try:
-                    result = self.apply_async(
-                        entry, producer=producer, advance=False
+        # Tenants are sent to as they're fetched, so that memory doesn't grow with their number.
+        sent = failures = deferred = 0
+        query_seconds = perf_counter() - started_at
+        chunks = iter_schema_names(tenants, self.tenant_chunk_size)
+        while True:
+            fetch_started_at = perf_counter()
+            schemas = next(chunks, None)
+            query_seconds += perf_counter() - fetch_started_at
+            if schemas is None:
+                break
+
+            ready_schemas = tenant_readiness.filter_ready(schemas)
+            deferred += len(schemas) - len(ready_schemas)
+            for schema in ready_schemas:
+                options = entry.options
+                if send_headers is not None:
+                    options = {**options, "headers": {**send_headers, "_schema_name": schema}}
+                if countdowns:
+                    # Tenants created since counting them get the last countdown.
+                    options = {**options, "countdown": countdowns[min(sent, len(countdowns) - 1)]}
+                if tenant_tiers.enabled:
+                    options = tenant_tiers.apply(
+                        {**options, "headers": {**options["headers"], "_schema_name": schema}},
+                        router=self.app.amqp.router,
+                        name=entry.task,
+                        args=entry.args,
+                        kwargs=entry.kwargs,
+                    )
+                send_entry = entry
+                if options is not entry.options:
+                    send_entry = copy.copy(entry)
+                    send_entry.options = options
+
+                sent += 1
+                with schema_context(schema):
+                    logger.debug(
+                        "Sending due task %s (%s) to tenant %s",
+                        entry.name,
+                        entry.task,
+                        schema,
                     )
-                except Exception as exc:
-                    logger.exception(exc)
-                else:
-                    logger.debug("%s sent. id->%s", entry.task, result.id)
+                    try:
+                        result = self.apply_async(
+                            send_entry, producer=producer, advance=False
+                        )
+                    except Exception as exc:
+                        failures += 1
+                        logger.exception(exc)
+                    else:
+                        logger.debug("%s sent. id->%s", entry.task, result.id)
+
+        if deferred:
+            logger.info(
+                "TenantAwareScheduler: Deferred task %s for %d tenants being migrated", entry.name, deferred
+            )
+
+        send_seconds = perf_counter() - started_at - query_seconds
+        self._last_entry_stats = {
+            "entry": entry.name,
+            "tenants": sent,
+            "failures": failures,
+            "deferred": deferred,
+            "query_seconds": query_seconds,
+            "send_seconds": send_seconds,
+            "sends_per_second": (sent - failures) / send_seconds if send_seconds else None,
+        }
+        if self._tick_entry_stats is not None:
+            self._tick_entry_stats.append(self._last_entry_stats)
+        logger.info("TenantAwareScheduler: Sent due task %s: %s", entry.name, self._last_entry_stats)
+        if metrics.enabled:
+            metrics.observe("tenant_beat_tenant_query_seconds", query_seconds, entry=entry.name)
+            metrics.observe("tenant_beat_send_seconds", send_seconds, entry=entry.name)
+            metrics.increment("tenant_beat_sends_total", sent - failures, entry=entry.name)
+            metrics.increment("tenant_beat_send_failures_total", failures, entry=entry.name)
 
 
-# These classes need custom entry to provide backwards-compatibility to remove the now not-used tenant_schemas field.
+# These classes need a custom entry keeping the schemas the task is sent to.
 class TenantAwareScheduler(TenantAwareSchedulerMixin, Scheduler):
     Entry = TenantAwareScheduleEntry
 
     def merge_inplace(self, b: dict[str, object]) -> None:
-        return super().merge_inplace(self._tenant_aware_beat_schedule_to_dict(b))
+        entries = self._tenant_aware_beat_schedule_to_dict(b)
+        self._migrate_per_schema_entries(entries)
+        return super().merge_inplace(entries)
 
 
 class TenantAwarePersistentScheduler(
@@ -107,4 +347,6 @@ class TenantAwarePersistentScheduler(
     Entry = TenantAwareScheduleEntry
 
     def merge_inplace(self, b: dict[str, object]) -> None:
-        return super().merge_inplace(self._tenant_aware_beat_schedule_to_dict(b))
+        entries = self._tenant_aware_beat_schedule_to_dict(b)
+        self._migrate_per_schema_entries(entries)
+        return super().merge_inplace(entries)
@@ -0,0 +1,7 @@
+from celery.utils.dispatch import Signal
+
+#: Sent by the tenant-aware schedulers when a beat tick takes longer than its budget.
+beat_tick_overrun = Signal(
+    name="beat_tick_overrun",
+    providing_args={"duration", "budget", "entry_stats"},
+)
@@ -0,0 +1,177 @@
+import logging
+import os
+import shelve
+import sqlite3
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from celery import __version__
+from celery.beat import PersistentScheduler
+
+from tenant_schemas_celery.scheduler import TenantAwareScheduler
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (
+    name TEXT PRIMARY KEY,
+    last_run_at TEXT NOT NULL,
+    total_run_count INTEGER NOT NULL
+);
+"""
+
+
+class EntryState(NamedTuple):
+    """The part of a schedule entry that is persisted, the rest comes from `beat_schedule`."""
+
+    last_run_at: datetime
+    total_run_count: int
+
+
+class TenantAwareSQLiteScheduler(TenantAwareScheduler):
+    """Tenant-aware scheduler persisting the schedule in a SQLite database.
+
+    Unlike `TenantAwarePersistentScheduler`, which pickles and syncs the whole
+    shelve, only the last run time and run count of entries that changed since
+    the previous sync are written, as plain rows. The database is stored next
+    to the schedule file, with the `.sqlite3` suffix. An existing shelve
+    schedule file is migrated on first start.
+    """
+
+    suffix = ".sqlite3"
+
+    _connection: Optional[sqlite3.Connection] = None
+
+    def __init__(self, *args, **kwargs):
+        self.schedule_filename = kwargs.get("schedule_filename")
+        # Entries' state written in the database, and the state to restore them with on setup.
+        self._stored: dict[str, EntryState] = {}
+        self._restored: dict[str, EntryState] = {}
+        super().__init__(*args, **kwargs)
+
+    @property
+    def database_filename(self) -> str:
+        return self.schedule_filename + self.suffix
+
+    def _open_database(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.database_filename, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _read_entries(self) -> dict[str, EntryState]:
+        return {
+            name: EntryState(datetime.fromisoformat(last_run_at), total_run_count)
+            for name, last_run_at, total_run_count in self._connection.execute(
+                "SELECT name, last_run_at, total_run_count FROM entries"
+            )
+        }
+
+    def _load(self) -> dict[str, EntryState]:
+        """Return the state to restore the entries with."""
+        meta = dict(self._connection.execute("SELECT key, value FROM meta"))
+        if not meta:
+            return self._migrate_shelve()
+
+        tz, utc = str(self.app.conf.timezone), str(self.app.conf.enable_utc)
+        if meta.get("tz") != tz or meta.get("utc_enabled") != utc:
+            logger.warning(
+                "TenantAwareSQLiteScheduler: Reset, timezone changed from %s (UTC %s) to %s (UTC %s)",
+                meta.get("tz"), meta.get("utc_enabled"), tz, utc,
+            )
+            return {}
+
+        return self._stored
+
+    def _migrate_shelve(self) -> dict[str, EntryState]:
+        """Read the entries' state from the `TenantAwarePersistentScheduler`'s shelve file, if any."""
+        if not any(
+            os.path.exists(self.schedule_filename + suffix) for suffix in PersistentScheduler.known_suffixes
+        ):
+            return {}
+
+        try:
+            with shelve.open(self.schedule_filename, flag="r") as store:
+                if store.get("tz") != self.app.conf.timezone or store.get("utc_enabled") != self.app.conf.enable_utc:
+                    return {}
+                entries = store.get("entries", {})
+                stored = {
+                    name: EntryState(entry.last_run_at, entry.total_run_count) for name, entry in entries.items()
+                }
+        except Exception as exc:
+            logger.warning(
+                "TenantAwareSQLiteScheduler: Could not migrate schedule file %r: %r", self.schedule_filename, exc
+            )
+            return {}
+
+        logger.info(
+            "TenantAwareSQLiteScheduler: Migrated %d entries from schedule file %r",
+            len(stored),
+            self.schedule_filename,
+        )
+        return stored
+
+    def setup_schedule(self):
+        self._connection = self._open_database()
+        self._stored = self._read_entries()
+        self._restored = self._load()
+        super().setup_schedule()
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [
+                ("__version__", __version__),
+                ("tz", str(self.app.conf.timezone)),
+                ("utc_enabled", str(self.app.conf.enable_utc)),
+            ],
+        )
+        self._restored = {}
+        self.sync()
+
+    def merge_inplace(self, b: dict[str, object]) -> None:
+        entries = self._tenant_aware_beat_schedule_to_dict(b)
+        self._migrate_per_schema_entries(entries, self._restored)
+        # Skip TenantAwareScheduler's migration, entries aren't persisted in the schedule itself.
+        super(TenantAwareScheduler, self).merge_inplace(entries)
+        for name, entry in self.schedule.items():
+            state = self._restored.get(name)
+            if state is not None:
+                entry.last_run_at, entry.total_run_count = state
+
+    def sync(self):
+        if self._connection is None:
+            return
+
+        changed = {}
+        for name, entry in self.schedule.items():
+            state = EntryState(entry.last_run_at, entry.total_run_count)
+            if self._stored.get(name) != state:
+                changed[name] = state
+        removed = [name for name in self._stored if name not in self.schedule]
+        if not changed and not removed:
+            return
+
+        with self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                "INSERT INTO entries (name, last_run_at, total_run_count) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET "
+                "last_run_at = excluded.last_run_at, total_run_count = excluded.total_run_count",
+                [(name, state.last_run_at.isoformat(), state.total_run_count) for name, state in changed.items()],
+            )
+            self._connection.executemany("DELETE FROM entries WHERE name = ?", [(name,) for name in removed])
+
+        self._stored.update(changed)
+        for name in removed:
+            del self._stored[name]
+
+    def close(self):
+        self.sync()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @property
+    def info(self):
+        return f"    . db -> {self.database_filename}"
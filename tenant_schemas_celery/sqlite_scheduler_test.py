@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from celery import schedules
+from pytest import fixture
+
+from tenant_schemas_celery.app import CeleryApp
+from tenant_schemas_celery.scheduler import TenantAwarePersistentScheduler
+from tenant_schemas_celery.sqlite_scheduler import EntryState, TenantAwareSQLiteScheduler
+
+ENTRY_NAME = "test_tenant_specific_task@__tenant_schemas__"
+
+
+@fixture
+def app() -> CeleryApp:
+    app = CeleryApp("test_app", set_as_current=False)
+    app.conf.beat_schedule = {
+        "test_tenant_specific_task": {
+            "task": "tenant_specific_task",
+            "schedule": schedules.crontab(minute="*"),
+            "tenant_schemas": ["tenant1", "tenant2"],
+        },
+        "test_generic_task": {
+            "task": "generic_task",
+            "schedule": schedules.crontab(minute="*"),
+        },
+    }
+    return app
+
+
+@fixture
+def schedule_filename(tmp_path) -> str:
+    return str(tmp_path / "schedule")
+
+
+def test_schedule_should_be_restored(app: CeleryApp, schedule_filename: str):
+    scheduler = TenantAwareSQLiteScheduler(app, schedule_filename=schedule_filename)
+    entry = scheduler.reserve(scheduler.schedule[ENTRY_NAME])
+    scheduler.close()
+
+    scheduler = TenantAwareSQLiteScheduler(app, schedule_filename=schedule_filename)
+
+    restored = scheduler.schedule[ENTRY_NAME]
+    assert EntryState(restored.last_run_at, restored.total_run_count) == EntryState(entry.last_run_at, 1)
+    assert restored.tenant_schemas == ("tenant1", "tenant2")
+    scheduler.close()
+
+
+def test_sync_should_only_write_changed_entries(app: CeleryApp, schedule_filename: str):
+    scheduler = TenantAwareSQLiteScheduler(app, schedule_filename=schedule_filename)
+    total_changes = scheduler._connection.total_changes
+
+    scheduler.sync()
+    assert scheduler._connection.total_changes == total_changes
+
+    scheduler.reserve(scheduler.schedule[ENTRY_NAME])
+    scheduler.sync()
+    assert scheduler._connection.total_changes == total_changes + 1
+    scheduler.close()
+
+
+def test_shelve_schedule_should_be_migrated(app: CeleryApp, schedule_filename: str):
+    scheduler = TenantAwarePersistentScheduler(app, schedule_filename=schedule_filename)
+    last_run_at = app.now() - timedelta(hours=1)
+    scheduler.schedule[ENTRY_NAME].last_run_at = last_run_at
+    scheduler.schedule[ENTRY_NAME].total_run_count = 5
+    scheduler.close()
+
+    scheduler = TenantAwareSQLiteScheduler(app, schedule_filename=schedule_filename)
+
+    entry = scheduler.schedule[ENTRY_NAME]
+    assert EntryState(entry.last_run_at, entry.total_run_count) == EntryState(last_run_at, 5)
+    assert scheduler._read_entries()[ENTRY_NAME] == EntryState(last_run_at, 5)
+    scheduler.close()
@@ -1,17 +1,41 @@
 import copy
+from collections.abc import Mapping
+from time import perf_counter
 from typing import Optional
 from celery import Task
-from django.db import connection
+from celery.utils.imports import symbol_by_name
 from tenant_schemas_celery.cache import SimpleCache
+from tenant_schemas_celery.context import get_current_schema
+from tenant_schemas_celery.invalidation import tenant_cache_invalidations
+from tenant_schemas_celery.metrics import metrics
+from tenant_schemas_celery.prewarm import prewarmed_tenants
 
 
 _shared_storage = {}
+_shared_database_storage = {}
 
 
 class SharedTenantCache(SimpleCache):
+    metrics_name = "tenant"
+
     def __init__(self):
         super().__init__(storage=_shared_storage)
 
+    def get(self, key, default):
+        tenant_cache_invalidations.consume(self)
+        return super().get(key, default)
+
+
+class SharedTenantDatabasesCache(SimpleCache):
+    metrics_name = "tenant_databases"
+
+    def __init__(self):
+        super().__init__(storage=_shared_database_storage)
+
+    def get(self, key, default):
+        tenant_cache_invalidations.consume(self)
+        return super().get(key, default)
+
 
 # DjangoTask requires Celery 5.4. Before then, we can't use it.
 try:
@@ -25,6 +49,9 @@ except ImportError:
 def headers_with_schema(headers: Optional[dict[str, object]]) -> dict[str, object]:
     """Add current schema to the headers, if not already present.
 
+    The current schema is the context's, see `tenant_schemas_celery.context`,
+    or else the default connection's.
+
     Will return a copy of the headers if the schema was added.
     Otherwise, returns the original headers.
     """
@@ -32,7 +59,7 @@ def headers_with_schema(headers: Optional[dict[str, object]]) -> dict[str, objec
         return headers
 
     headers = copy.deepcopy(headers) if headers else {}
-    headers["_schema_name"] = connection.schema_name
+    headers["_schema_name"] = get_current_schema()
     return headers
 
 
@@ -41,6 +68,15 @@ class TenantTask(BaseTask):
 
     tenant_cache_seconds = None
     tenant_databases = None
+    tenant_fields = None
+    tenant_database_resolver = None
+    tenant_read_only = False
+    tenant_replica_databases = None
+    tenant_migration_retry_delay = 30
+    tenant_dedup_window = None
+    tenant_prewarmed = None
+    # Whether the task is a coroutine, run by `AsyncTenantTask`.
+    tenant_async = False
 
     @classmethod
     def get_tenant_databases(cls):
@@ -52,16 +88,107 @@ class TenantTask(BaseTask):
         return ("default",)
 
     @classmethod
-    def tenant_cache(cls):
-        return SharedTenantCache()
+    def get_tenant_replica_databases(cls):
+        """Return the databases (or mapping of databases to replicas) used by read-only tasks, or `None`"""
+        if cls.tenant_replica_databases is not None:
+            return cls.tenant_replica_databases
+        if hasattr(cls.app.conf, "task_tenant_replica_databases") is True:
+            return cls.app.conf.task_tenant_replica_databases
+        return None
 
     @classmethod
-    def get_tenant_for_schema(cls, schema_name):
-        from tenant_schemas_celery.compat import get_tenant_model
+    def get_tenant_database_resolver(cls):
+        """Return the callable mapping a schema name to its databases, if any"""
+        resolver = cls.tenant_database_resolver
+        if resolver is None and hasattr(cls.app.conf, "task_tenant_database_resolver") is True:
+            resolver = cls.app.conf.task_tenant_database_resolver
+        if isinstance(resolver, str):
+            resolver = symbol_by_name(resolver)
+        return resolver
+
+    @classmethod
+    def get_tenant_databases_for_schema(cls, schema_name):
+        """Return the databases where the given schema lives
+
+        Without a resolver, every schema lives in `get_tenant_databases()`.
+        The public schema is expected to be present in all of them.
+        Read-only tasks use the replica databases, when configured. With a
+        resolver, replicas are given as a mapping of databases to their
+        replica, and read-only tasks use the replicas of the resolved databases.
+        """
+        tenant_databases = cls._resolve_tenant_databases(schema_name)
+        if not cls.tenant_read_only:
+            return tenant_databases
+
+        replica_databases = cls.get_tenant_replica_databases()
+        if replica_databases is None:
+            return tenant_databases
+        if isinstance(replica_databases, Mapping):
+            return tuple(replica_databases.get(db_name, db_name) for db_name in tenant_databases)
+        if cls.get_tenant_database_resolver() is not None:
+            raise ValueError(
+                "tenant_replica_databases must map databases to their replica when a database resolver is configured"
+            )
+        return replica_databases
+
+    @classmethod
+    def _resolve_tenant_databases(cls, schema_name):
+        from tenant_schemas_celery.compat import get_public_schema_name
+
+        resolver = cls.get_tenant_database_resolver()
+        if resolver is None or schema_name == get_public_schema_name():
+            return cls.get_tenant_databases()
 
         missing = object()
-        cache = cls.tenant_cache()
-        cached_value = cache.get(schema_name, default=missing)
+        cache = SharedTenantDatabasesCache()
+        tenant_databases = cache.get(schema_name, default=missing)
+        if tenant_databases is missing:
+            tenant_databases = tuple(resolver(schema_name))
+            cache.set(schema_name, tenant_databases, expire_seconds=cls.get_tenant_cache_seconds())
+
+        return tenant_databases
+
+    @classmethod
+    def get_tenant_fields(cls):
+        """Return the tenant fields to load, or `None` to load the whole tenant"""
+        if cls.tenant_fields is not None:
+            return cls.tenant_fields
+        if hasattr(cls.app.conf, "task_tenant_fields") is True:
+            return cls.app.conf.task_tenant_fields
+        return None
+
+    @classmethod
+    def get_tenant_prewarmed(cls):
+        """Return whether the tenant is read from the prewarmed table, when it's loaded"""
+        if cls.tenant_prewarmed is not None:
+            return cls.tenant_prewarmed
+        if hasattr(cls.app.conf, "task_tenant_prewarmed") is True:
+            return cls.app.conf.task_tenant_prewarmed
+        return True
+
+    @classmethod
+    def get_tenant_dedup_window(cls):
+        """Return the seconds during which identical sends are collapsed, or `None`"""
+        if cls.tenant_dedup_window is not None:
+            return cls.tenant_dedup_window
+        if hasattr(cls.app.conf, "task_tenant_dedup_window") is True:
+            return cls.app.conf.task_tenant_dedup_window
+        return None
+
+    @classmethod
+    def get_tenant_queryset(cls):
+        from tenant_schemas_celery.compat import get_tenant_model
+
+        queryset = get_tenant_model().objects.all()
+        tenant_fields = cls.get_tenant_fields()
+        if tenant_fields is not None:
+            # `schema_name` is all `connection.set_tenant` needs. Other fields
+            # are loaded from the database on first access.
+            queryset = queryset.only("schema_name", *tenant_fields)
+        return queryset
+
+    @classmethod
+    def get_tenant_cache_seconds(cls):
         tenant_cache_seconds = cls.tenant_cache_seconds
         if tenant_cache_seconds is None:  # if not set at task level
             try:  # to get from global setting
@@ -70,13 +197,51 @@ class TenantTask(BaseTask):
                 )
             except AttributeError:
                 tenant_cache_seconds = 0  # default
+        return tenant_cache_seconds
+
+    @classmethod
+    def tenant_cache(cls):
+        return SharedTenantCache()
+
+    @classmethod
+    def get_tenant_for_schema(cls, schema_name):
+        if prewarmed_tenants.enabled and cls.get_tenant_prewarmed():
+            # Not cached, so that prefork children keep sharing the table's pages.
+            tenant = prewarmed_tenants.get(schema_name)
+            if tenant is not None:
+                return tenant
+
+        missing = object()
+        cache = cls.tenant_cache()
+        cached_value = cache.get(schema_name, default=missing)
 
         if cached_value is missing:
-            cached_value = get_tenant_model().objects.get(schema_name=schema_name)
-            cache.set(schema_name, cached_value, expire_seconds=tenant_cache_seconds)
+            started_at = perf_counter()
+            cached_value = cls.get_tenant_queryset().get(schema_name=schema_name)
+            if metrics.enabled:
+                metrics.observe(
+                    "tenant_lookup_seconds",
+                    perf_counter() - started_at,
+                    schema=metrics.schema_label(schema_name),
+                )
+            cache.set(schema_name, cached_value, expire_seconds=cls.get_tenant_cache_seconds())
 
         return cached_value
 
+    def before_start(self, task_id, args, kwargs):
+        # Schema of the request, if it's being migrated. Set by `switch_schema`.
+        schema_name = getattr(self.request, "_tenant_migrating", None)
+        if schema_name is not None:
+            self.request._tenant_migrating = None
+            # Retry for as long as the schema is being migrated, regardless of `max_retries`.
+            raise self.retry(
+                countdown=self.tenant_migration_retry_delay,
+                max_retries=self.request.retries + 1,
+                headers={"_schema_name": schema_name},
+            )
+
+        super().before_start(task_id, args, kwargs)
+
     def apply(self, args=None, kwargs=None, *arg, **kw):
         kw["headers"] = headers_with_schema(kw.get("headers") or {})
         return super().apply(args, kwargs, *arg, **kw)
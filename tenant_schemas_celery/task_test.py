@@ -151,6 +151,42 @@ def test_get_tenant_databases_custom_settings(celery_conf):
     assert CustomTask.get_tenant_databases() == ("customdb",)
 
 
+def test_get_tenant_fields_should_prefer_task_setting_over_app_setting():
+    app = CeleryApp("testapp", set_as_current=False)
+
+    @app.task()
+    def some_task() -> None:
+        ...
+
+    assert some_task.get_tenant_fields() is None
+
+    app.conf.task_tenant_fields = ("name",)
+    assert some_task.get_tenant_fields() == ("name",)
+
+    class CustomTask(TenantTask):
+        tenant_fields = ()
+
+    assert CustomTask.get_tenant_fields() == ()
+
+
+def test_task_get_tenant_for_schema_should_only_load_configured_fields(transactional_db):
+    class DummyTask(TenantTask):
+        tenant_fields = ()
+
+        def run(self, *args, **kwargs):
+            pass
+
+    create_client(
+        name="test_fields", schema_name="test_fields", domain_url="test_fields.test.com"
+    )
+
+    tenant = DummyTask().get_tenant_for_schema("test_fields")
+
+    assert tenant.schema_name == "test_fields"
+    assert "name" in tenant.get_deferred_fields()
+    assert "schema_name" not in tenant.get_deferred_fields()
+
+
 @pytest.mark.parametrize("task_apply_func", [get_schema_name.apply, get_schema_name.apply_async])
 def test_apply_should_not_leak_schema_name_when_headers_passed(transactional_db, task_apply_func) -> None:
     tenant_one = create_client(
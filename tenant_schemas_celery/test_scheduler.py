@@ -1,17 +1,20 @@
 from collections.abc import Mapping
+from datetime import timedelta
 from tempfile import NamedTemporaryFile
 from typing import Any, Optional, TypedDict
 
 from celery import schedules, uuid
+from celery.beat import Scheduler
 from django.db import connection
 from django_tenants.utils import get_tenant_model, schema_context, get_public_schema_name
-from pytest import fixture, mark
+from pytest import fixture, mark, raises
 from tenant_schemas_celery.app import CeleryApp
 
 from tenant_schemas_celery.scheduler import (
     TenantAwarePersistentScheduler,
     TenantAwareScheduler,
 )
+from tenant_schemas_celery.signals import beat_tick_overrun
 
 Tenant = get_tenant_model()
 
@@ -87,19 +90,21 @@ class TestTenantAwareSchedulerMixin:
         for key, config in config.items():
             config_tenant_schemas = config.get("tenant_schemas", None)
             if config_tenant_schemas is None:
-                expected_entry_names = [f"{key}@__all_tenants_only__"]
-                expected_schema_names = [None]
+                expected_entry_name = f"{key}@__all_tenants_only__"
+                expected_schema_names = None
             else:
-                expected_entry_names = [f"{key}@{schema_name }" for schema_name in config_tenant_schemas]
-                expected_schema_names = config_tenant_schemas
+                expected_entry_name = f"{key}@__tenant_schemas__"
+                expected_schema_names = tuple(config_tenant_schemas)
 
-            for expected_entry_name, expected_schema_name in zip(expected_entry_names, expected_schema_names):
-                assert expected_entry_name in scheduler.schedule
-                entry = scheduler.schedule[expected_entry_name]
+            assert expected_entry_name in scheduler.schedule
+            entry = scheduler.schedule[expected_entry_name]
 
-                assert entry.task == config["task"]
-                assert entry.schedule == schedules.crontab(minute="*")
-                assert entry.options["headers"].get("_schema_name") == expected_schema_name
+            assert entry.task == config["task"]
+            assert entry.schedule == schedules.crontab(minute="*")
+            assert entry.tenant_schemas == expected_schema_names
+            assert "_schema_name" not in entry.options["headers"]
+
+        assert len(scheduler.schedule) == len(scheduler.app.conf.beat_schedule)
 
     @fixture
     def tenants(self) -> None:
@@ -119,13 +124,24 @@ class TestTenantAwareSchedulerMixin:
             if entry.options["headers"].get("_all_tenants_only"):
                 schemas = Tenant.objects.values_list("schema_name", flat=True)
             else:
-                schemas = [entry.options["headers"].get("_schema_name")]
+                schemas = entry.tenant_schemas
 
             for schema_name in schemas:
                 assert (schema_name, entry) in scheduler._sent
 
             scheduler._sent.clear()
 
+    @mark.django_db
+    def test_apply_entry_should_stream_tenants_in_chunks(self, scheduler: FakeScheduler, tenants: None):
+        scheduler.tenant_chunk_size = 1
+        for entry in scheduler.schedule.values():
+            scheduler.apply_entry(entry)
+
+            expected_schemas = entry.tenant_schemas or ("tenant1", "tenant2")
+            assert sorted(schema_name for schema_name, _ in scheduler._sent) == sorted(expected_schemas)
+            assert scheduler._last_entry_stats["tenants"] == len(expected_schemas)
+            scheduler._sent.clear()
+
     @mark.django_db
     class TestCustomQuerySet:
         @fixture
@@ -173,16 +189,158 @@ class TestTenantAwarePersistentScheduler:
         for key, config in config.items():
             config_tenant_schemas = config.get("tenant_schemas", None)
             if config_tenant_schemas is None:
-                expected_entry_names = [f"{key}@__all_tenants_only__"]
-                expected_schema_names = [None]
+                expected_entry_name = f"{key}@__all_tenants_only__"
+                expected_schema_names = None
             else:
-                expected_entry_names = [f"{key}@{schema_name }" for schema_name in config_tenant_schemas]
-                expected_schema_names = config_tenant_schemas
+                expected_entry_name = f"{key}@__tenant_schemas__"
+                expected_schema_names = tuple(config_tenant_schemas)
+
+            assert expected_entry_name in scheduler.schedule
+            entry = scheduler.schedule[expected_entry_name]
+
+            assert entry.task == config["task"]
+            assert entry.schedule == schedules.crontab(minute="*")
+            assert entry.tenant_schemas == expected_schema_names
+            assert "_schema_name" not in entry.options["headers"]
+
+
+
+class TestTenantAwarePersistentSchedulerMigration:
+    @fixture
+    def app(self) -> CeleryApp:
+        app = CeleryApp("test_app", set_as_current=False)
+        app.conf.beat_schedule = {
+            "test_tenant_specific_task": {
+                "task": "tenant_specific_task",
+                "schedule": schedules.crontab(minute="*"),
+                "tenant_schemas": ["tenant1", "tenant2"],
+            },
+        }
+        return app
+
+    def test_per_schema_entries_should_be_merged(self, app: CeleryApp, tmp_path):
+        schedule_filename = str(tmp_path / "schedule")
+        scheduler = TenantAwarePersistentScheduler(app, schedule_filename=schedule_filename)
+        last_run_at = app.now() - timedelta(hours=1)
+        for schema_name in ("tenant1", "tenant2"):
+            scheduler.schedule[f"test_tenant_specific_task@{schema_name}"] = TenantAwarePersistentScheduler.Entry(
+                name=f"test_tenant_specific_task@{schema_name}",
+                task="tenant_specific_task",
+                schedule=schedules.crontab(minute="*"),
+                options={"headers": {"_schema_name": schema_name}},
+                last_run_at=last_run_at,
+                total_run_count=3,
+                app=app,
+            )
+        del scheduler.schedule["test_tenant_specific_task@__tenant_schemas__"]
+        scheduler.close()
+
+        scheduler = TenantAwarePersistentScheduler(app, schedule_filename=schedule_filename)
+
+        assert "test_tenant_specific_task@tenant1" not in scheduler.schedule
+        assert "test_tenant_specific_task@tenant2" not in scheduler.schedule
+        entry = scheduler.schedule["test_tenant_specific_task@__tenant_schemas__"]
+        assert entry.last_run_at == last_run_at
+        assert entry.total_run_count == 3
+        assert entry.tenant_schemas == ("tenant1", "tenant2")
+
+
+class TestCatchUpPolicy:
+    entry_name = "test_tenant_specific_task@__tenant_schemas__"
+
+    @fixture
+    def app(self) -> CeleryApp:
+        app = CeleryApp("test_app", set_as_current=False)
+        app.conf.beat_schedule = {
+            "test_tenant_specific_task": {
+                "task": "tenant_specific_task",
+                "schedule": schedules.crontab(minute="*"),
+                "tenant_schemas": ["tenant1", "tenant2"],
+            },
+        }
+        return app
+
+    @fixture
+    def restart(self, app: CeleryApp, tmp_path):
+        """Persist a schedule missed during an hour of downtime, and return a function restarting beat."""
+        schedule_filename = str(tmp_path / "schedule")
+        scheduler = TenantAwarePersistentScheduler(app, schedule_filename=schedule_filename)
+        scheduler.schedule[self.entry_name].last_run_at = app.now() - timedelta(hours=1)
+        scheduler.close()
+
+        def restart(policy: Optional[str]) -> TenantAwarePersistentScheduler:
+            app.conf.beat_tenant_catch_up = policy
+            return TenantAwarePersistentScheduler(app, schedule_filename=schedule_filename)
+
+        return restart
+
+    def test_missed_entry_should_run_once_by_default(self, restart):
+        scheduler = restart(None)
+
+        assert scheduler.schedule[self.entry_name].is_due().is_due
+        assert scheduler._catch_up_countdowns(scheduler.schedule[self.entry_name], 2) is None
+
+    def test_missed_entry_should_be_skipped(self, restart):
+        scheduler = restart("skip")
+
+        assert not scheduler.schedule[self.entry_name].is_due().is_due
+
+    def test_missed_entry_should_be_spread_once(self, restart):
+        scheduler = restart("spread")
+        scheduler.app.conf.beat_tenant_catch_up_window = 60
+        entry = scheduler.schedule[self.entry_name]
 
-            for expected_entry_name, expected_schema_name in zip(expected_entry_names, expected_schema_names):
-                assert expected_entry_name in scheduler.schedule
-                entry = scheduler.schedule[expected_entry_name]
+        assert entry.is_due().is_due
+        assert scheduler._catch_up_countdowns(entry, 4) == [0, 15, 30, 45]
+        assert scheduler._catch_up_countdowns(entry, 4) is None
 
-                assert entry.task == config["task"]
-                assert entry.schedule == schedules.crontab(minute="*")
-                assert entry.options["headers"].get("_schema_name") == expected_schema_name
+    def test_unknown_policy_should_raise(self, restart):
+        with raises(ValueError, match="unknown catch-up policy"):
+            restart("replay")
+
+
+@COMMON_PARAMETERS
+class TestTickOverrun:
+    @fixture
+    def scheduler(self, app: CeleryApp) -> FakeScheduler:
+        app.conf.beat_tenant_tick_budget = 1e-9
+        return FakeScheduler(app)
+
+    def test_overrun_should_be_signalled(self, scheduler: FakeScheduler):
+        received = []
+
+        def receiver(sender, duration, budget, entry_stats, **kwargs):
+            received.append((sender, budget))
+
+        beat_tick_overrun.connect(receiver)
+        try:
+            scheduler.tick()
+        finally:
+            beat_tick_overrun.disconnect(receiver)
+
+        assert received == [(scheduler, 1e-9)]
+
+    @mark.django_db
+    def test_overrun_should_report_every_entry_sent_in_the_tick(self, scheduler: FakeScheduler, monkeypatch):
+        def tick(self, *args, **kwargs):
+            # Send every entry in one tick, like a scheduler catching up.
+            for entry in self.schedule.values():
+                self.apply_entry(entry)
+            return 0
+
+        monkeypatch.setattr(Scheduler, "tick", tick)
+        received = []
+
+        def receiver(sender, entry_stats, **kwargs):
+            received.append(entry_stats)
+
+        beat_tick_overrun.connect(receiver)
+        try:
+            scheduler.tick()
+        finally:
+            beat_tick_overrun.disconnect(receiver)
+
+        [entry_stats] = received
+        assert sorted(stats["entry"] for stats in entry_stats) == sorted(scheduler.schedule)
+        durations = [stats["query_seconds"] + stats["send_seconds"] for stats in entry_stats]
+        assert durations == sorted(durations, reverse=True)
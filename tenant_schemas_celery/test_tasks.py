@@ -2,6 +2,7 @@ from __future__ import absolute_import
 
 from celery import shared_task, Task
 from django.db import connection, connections
+from test_app.shared.models import Client
 from test_app.tenant.models import DummyModel
 
 from .task import TenantTask
@@ -73,3 +74,17 @@ def multiple_db_task():
     for the two given databases
     """
     return {name: connections[name].schema_name for name in connections}
+
+
+class RoutedTask(TenantTask):
+    resolved_schemas = []
+
+    @staticmethod
+    def tenant_database_resolver(schema_name):
+        RoutedTask.resolved_schemas.append(schema_name)
+        return ["otherdb1"]
+
+    @classmethod
+    def get_tenant_for_schema(cls, schema_name):
+        # Unsaved tenant, so that switching schemas doesn't need the database.
+        return Client(schema_name=schema_name)
@@ -0,0 +1,146 @@
+from datetime import timezone
+from time import time
+from typing import NamedTuple, Optional
+
+from celery.utils.time import maybe_iso8601
+
+from tenant_schemas_celery.cache import SimpleCache
+from tenant_schemas_celery.metrics import metrics
+
+
+class TenantTier(NamedTuple):
+    """Priority and/or queue of the tasks of a tier's tenants."""
+
+    name: str
+    priority: Optional[int] = None
+    queue: Optional[str] = None
+
+
+class TenantTiers:
+    """Maps tenants to priority tiers, applied to tasks when they're sent.
+
+    A tenant's tier is looked up by schema name first, then in the tenant's
+    `attribute` (if configured), falling back to the `default` tier. Options
+    passed explicitly to `apply_async` take precedence over the tier's, and
+    so do the queues of tasks matched by `task_routes`.
+
+    Disabled until configured.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.tiers: dict[str, TenantTier] = {}
+        self.schemas: dict[str, str] = {}
+        self.attribute: Optional[str] = None
+        self.default: Optional[str] = None
+        self.cache_seconds = 60
+        self._tenant_tiers = SimpleCache()
+
+    def configure(
+        self,
+        tiers: dict[str, dict[str, object]],
+        schemas: Optional[dict[str, str]] = None,
+        attribute: Optional[str] = None,
+        default: Optional[str] = None,
+        cache_seconds: int = 60,
+    ) -> None:
+        """Enable the tiers, i.e. `{"premium": {"priority": 9, "queue": "premium"}}`.
+
+        Tenants' tiers read from `attribute` are cached for `cache_seconds`.
+        """
+        parsed = {}
+        for name, options in tiers.items():
+            unknown = set(options).difference(("priority", "queue"))
+            if unknown:
+                raise ValueError(f"Unknown options of tier {name!r}: {', '.join(sorted(unknown))}")
+            parsed[name] = TenantTier(name, **options)
+
+        schemas = dict(schemas or {})
+        for tier in (*schemas.values(), *([default] if default is not None else [])):
+            if tier not in parsed:
+                raise ValueError(f"Unknown tier {tier!r}, expected one of: {', '.join(parsed)}")
+
+        self.tiers = parsed
+        self.schemas = schemas
+        self.attribute = attribute
+        self.default = default
+        self.cache_seconds = cache_seconds
+        self._tenant_tiers.clear()
+        self.enabled = True
+
+    def _tier_name_from_tenant(self, schema_name: str) -> Optional[str]:
+        from django.db import connection
+
+        from tenant_schemas_celery.compat import get_tenant_model
+
+        missing = object()
+        tier_name = self._tenant_tiers.get(schema_name, missing)
+        if tier_name is not missing:
+            return tier_name
+
+        tenant = getattr(connection, "tenant", None)
+        if getattr(tenant, "schema_name", None) != schema_name:
+            tenant = get_tenant_model().objects.filter(schema_name=schema_name).first()
+        tier_name = getattr(tenant, self.attribute, None)
+        self._tenant_tiers.set(schema_name, tier_name, expire_seconds=self.cache_seconds)
+        return tier_name
+
+    def tier_for_schema(self, schema_name: str) -> Optional[TenantTier]:
+        tier_name = self.schemas.get(schema_name)
+        if tier_name is None and self.attribute is not None:
+            tier_name = self._tier_name_from_tenant(schema_name)
+        return self.tiers.get(tier_name if tier_name is not None else self.default)
+
+    def apply(
+        self, options: dict[str, object], router=None, name: Optional[str] = None, args=None, kwargs=None
+    ) -> dict[str, object]:
+        """Return the send options with the tier of the tenant in their `_schema_name` header applied.
+
+        The tier's queue isn't applied to the task `name` if the `router` (i.e. `app.amqp.router`) has a route for it.
+        """
+        headers = options.get("headers") or {}
+        if "_tenant_tier" in headers:
+            return options
+
+        tier = self.tier_for_schema(headers["_schema_name"])
+        if tier is None:
+            return options
+
+        # The latency is measured from the time the task is due, see `observe_latency`.
+        headers = {**headers, "_tenant_tier": tier.name, "_tenant_tier_sent_at": _due_at(options)}
+        options = {**options, "headers": headers}
+        if tier.priority is not None and options.get("priority") is None:
+            options["priority"] = tier.priority
+        if tier.queue is not None and options.get("queue") is None and not _is_routed(router, name, args, kwargs, options):
+            options["queue"] = tier.queue
+        return options
+
+    def observe_latency(self, headers: dict[str, object]) -> None:
+        """Record the time the task waited for a worker since it was due, by tier."""
+        tier_name, sent_at = headers.get("_tenant_tier"), headers.get("_tenant_tier_sent_at")
+        if tier_name is not None and sent_at is not None:
+            metrics.observe("tenant_tier_latency_seconds", max(time() - sent_at, 0), tier=tier_name)
+
+
+def _due_at(options: dict[str, object]) -> float:
+    """The timestamp the task is due at, i.e. when sent unless it has a countdown or an eta."""
+    if options.get("countdown"):
+        return time() + options["countdown"]
+
+    eta = options.get("eta")
+    if eta is None:
+        return time()
+    eta = maybe_iso8601(eta)
+    if eta.tzinfo is None:
+        # Like celery, naive etas are in UTC.
+        eta = eta.replace(tzinfo=timezone.utc)
+    return eta.timestamp()
+
+
+def _is_routed(router, name: Optional[str], args, kwargs, options: dict[str, object]) -> bool:
+    if router is None or not router.routes:
+        return False
+    return router.lookup_route(name, args, kwargs or {}, options, options.get("task_type")) is not None
+
+
+tenant_tiers = TenantTiers()
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+from time import time
+
+import pytest
+
+from tenant_schemas_celery.app import CeleryApp, restore_schema, switch_schema
+from tenant_schemas_celery.metrics import MetricsRegistry, metrics
+from tenant_schemas_celery.test_tasks import RoutedTask
+from tenant_schemas_celery.tiers import TenantTier, tenant_tiers
+
+
+@pytest.fixture
+def tiers():
+    tenant_tiers.configure(
+        tiers={"premium": {"priority": 9, "queue": "premium"}, "bulk": {"priority": 0}},
+        schemas={"tenant1": "premium"},
+        default="bulk",
+    )
+    yield tenant_tiers
+    tenant_tiers.enabled = False
+
+
+def test_tier_should_be_applied_to_send_options(tiers) -> None:
+    assert tiers.tier_for_schema("tenant1") == TenantTier("premium", 9, "premium")
+    assert tiers.tier_for_schema("tenant2") == TenantTier("bulk", 0)
+
+    options = tiers.apply({"headers": {"_schema_name": "tenant1"}})
+    assert (options["priority"], options["queue"], options["headers"]["_tenant_tier"]) == (9, "premium", "premium")
+
+    # Explicit options take precedence.
+    options = tiers.apply({"headers": {"_schema_name": "tenant1"}, "queue": "imports"})
+    assert (options["priority"], options["queue"]) == (9, "imports")
+
+
+def test_routed_tasks_should_keep_their_queue(tiers, monkeypatch) -> None:
+    app = CeleryApp("test_app", broker="memory://", set_as_current=False)
+    app.conf.task_routes = {"imports.*": {"queue": "imports"}}
+    queues = []
+    monkeypatch.setattr(
+        app.amqp, "send_task_message", lambda producer, name, message, queue=None, **kwargs: queues.append(queue.name)
+    )
+
+    for name in ("imports.run", "stats.recalculate"):
+        app.send_task(name, headers={"_schema_name": "tenant1"})
+
+    assert queues == ["imports", "premium"]
+
+
+def test_tier_latency_should_be_measured_from_eta(tiers) -> None:
+    headers = {"_schema_name": "tenant1"}
+    due_at = datetime.now(timezone.utc) + timedelta(minutes=1)
+
+    countdown_sent_at = tiers.apply({"headers": headers, "countdown": 60})["headers"]["_tenant_tier_sent_at"]
+    eta_sent_at = tiers.apply({"headers": headers, "eta": due_at})["headers"]["_tenant_tier_sent_at"]
+    naive_eta_sent_at = tiers.apply({"headers": headers, "eta": due_at.replace(tzinfo=None)})["headers"][
+        "_tenant_tier_sent_at"
+    ]
+
+    assert countdown_sent_at == pytest.approx(time() + 60, abs=1)
+    assert eta_sent_at == naive_eta_sent_at == due_at.timestamp()
+
+
+def test_unknown_tier_should_be_rejected() -> None:
+    with pytest.raises(ValueError):
+        tenant_tiers.configure(tiers={"premium": {"priority": 9}}, schemas={"tenant1": "gold"})
+    with pytest.raises(ValueError):
+        tenant_tiers.configure(tiers={"premium": {"routing_key": "premium"}})
+
+
+def test_switch_schema_should_record_tier_latency(tiers) -> None:
+    metrics.configure([metrics.registry])
+    app = CeleryApp(set_as_current=False)
+
+    @app.task(base=RoutedTask, shared=False)
+    def task() -> None:
+        ...
+
+    task.push_request(headers={"_schema_name": "public", "_tenant_tier": "bulk", "_tenant_tier_sent_at": time() - 2})
+    try:
+        switch_schema(task, {})
+        restore_schema(task)
+    finally:
+        task.pop_request()
+        registry: MetricsRegistry = metrics.registry
+        histogram = registry.get_histogram("tenant_tier_latency_seconds", tier="bulk")
+        registry.clear()
+        metrics.configure([])
+
+    assert histogram.count == 1
+    assert histogram.sum >= 2
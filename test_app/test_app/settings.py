@@ -31,7 +31,7 @@ ALLOWED_HOSTS = []
 # Application definition
 
 TENANT_APPS = ['test_app.tenant', 'django_celery_beat']
-SHARED_APPS = ['test_app.shared', 'django_celery_beat']
+SHARED_APPS = ['test_app.shared', 'django_celery_beat', 'tenant_schemas_celery.periodic_tasks']
 
 INSTALLED_APPS = ['django_tenants', 'django_celery_beat']
 DB_ENGINE = 'django_tenants.postgresql_backend'
@@ -48,6 +48,7 @@ INSTALLED_APPS += [
     'django.contrib.staticfiles',
 
     'tenant_schemas_celery',
+    'tenant_schemas_celery.periodic_tasks',
     'test_app.shared',
     'test_app.tenant',
 ]